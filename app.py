@@ -1,95 +1,147 @@
 import streamlit as st
-from src.graph import create_graph
+from src.graph import get_shared_graph, thread_config
+import functools
 import os
+import queue
+import threading
+import time
+import uuid
 from dotenv import load_dotenv
-from src.utils import get_llm
+from src.utils import stream_to, ttft_stats
+from src.aio import run_async
+from src import curriculum
+from src.resources import warm_up
+from src.scheduler import get_scheduler, set_session
+from src.quiz import split_questions
+from src.state import initial_state
+from src.prefetch import CheckpointPrefetcher
+from src.search import get_search_cache
+from src.llm_cache import get_llm_cache
+from src.curriculum_store import get_curriculum_store
+from src.question_bank import get_question_bank
+from src.singleflight import get_single_flight
+from src.chroma_gc import get_chroma_maintenance
+from src.prompting import prompt_stats
+from src.sessions import get_session_store
 
 load_dotenv()
 
 st.set_page_config(page_title="AI Learning Assistant", page_icon="🎓", layout="wide")
 
-# Check for required API key
-if not os.getenv("GROQ_API_KEY"):
+# Check for required API key (the offline local provider needs none)
+if not os.getenv("GROQ_API_KEY") and os.getenv("LLM_PROVIDER", "groq") != "local":
     st.error("⚠️ GROQ_API_KEY not found in environment variables")
     st.stop()
 
-# Initialize session state
-if "agent" not in st.session_state:
-    st.session_state.agent = create_graph()
-if "topic" not in st.session_state:
+@st.cache_resource
+def start_warm_up():
+    """Warm the graph, LLM client, embedding model and vector store once per server process,
+    in the background so the topic form renders without waiting"""
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+start_warm_up()
+
+@st.cache_resource(show_spinner="Loading learning agent...")
+def load_graph():
+    """One compiled graph per server process, persisting state to SQLite per thread"""
+    return get_shared_graph()
+
+sessions = get_session_store()
+
+# Initialize session state: a session ID in the URL lets learners resume after a restart
+if "session_id" not in st.session_state:
+    st.session_state.session_id = st.query_params.get("session") or str(uuid.uuid4())
+    st.query_params["session"] = st.session_state.session_id
+    saved = sessions.load(st.session_state.session_id) or {}
+    st.session_state.topic = saved.get("topic")
+    st.session_state.checkpoints = saved.get("checkpoints", [])
+    st.session_state.path_id = saved.get("path_id")
+    st.session_state.checkpoint_idx = saved.get("checkpoint_idx", 0)
+    st.session_state.prefetcher = None
+set_session(st.session_state.session_id)  # Fair LLM queueing across learners
+
+def checkpoint_config(idx=None):
+    """Graph config for a checkpoint of this learner's path (the current one by default)"""
+    idx = st.session_state.checkpoint_idx if idx is None else idx
+    return thread_config(st.session_state.session_id, st.session_state.path_id, idx)
+
+def load_state():
+    """Persisted workflow state of the current checkpoint, or None if it has not been prepared"""
+    values = load_graph().get_state(checkpoint_config()).values
+    return dict(values) if values.get("questions") else None
+
+def make_prefetcher(checkpoints):
+    # Prefetch runs on worker threads, which cannot read st.session_state: bind plain values here
+    config_for = functools.partial(thread_config, st.session_state.session_id, st.session_state.path_id)
+    return CheckpointPrefetcher(load_graph(), checkpoints, config_for=config_for)
+
+if st.session_state.topic and st.session_state.prefetcher is None:
+    st.session_state.prefetcher = make_prefetcher(st.session_state.checkpoints)
+
+def reset_topic():
+    """Clear the learning path and abandon any background prefetching"""
+    if st.session_state.prefetcher:
+        st.session_state.prefetcher.cancel()
+    sessions.clear(st.session_state.session_id)
+    st.session_state.prefetcher = None
     st.session_state.topic = None
-if "checkpoints" not in st.session_state:
     st.session_state.checkpoints = []
-if "checkpoint_idx" not in st.session_state:
+    st.session_state.path_id = None
     st.session_state.checkpoint_idx = 0
-if "state" not in st.session_state:
-    st.session_state.state = None
 
 def generate_checkpoints(topic):
     """Generate learning checkpoints using LLM"""
-    llm = get_llm()
-    
-    prompt = f"""
-    You are an expert learning path designer. Create a structured learning path for the topic: "{topic}"
-    
-    Generate EXACTLY 5 learning checkpoints that progressively build understanding.
-    Each checkpoint should have:
-    1. A clear, concise checkpoint name (2-4 words)
-    2. Specific learning objectives (comma-separated, 5 key concepts)
-    
-    FORMAT (follow exactly):
-    CHECKPOINT_1: [Name]
-    OBJECTIVES_1: [Objective1, Objective2, Objective3, Objective4, Objective5]
-    
-    CHECKPOINT_2: [Name]
-    OBJECTIVES_2: [Objective1, Objective2, Objective3, Objective4, Objective5]
-    
-    [Continue for all 5 checkpoints]
-    
-    Make checkpoints logical, progressive, and comprehensive.
-    """
-    
     try:
-        response = llm.invoke(prompt).content
-        checkpoints = []
-        
-        # Parse the response
-        lines = response.strip().split('\n')
-        current_checkpoint = {}
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('CHECKPOINT_'):
-                if current_checkpoint:
-                    checkpoints.append(current_checkpoint)
-                current_checkpoint = {'topic': line.split(':', 1)[1].strip()}
-            elif line.startswith('OBJECTIVES_'):
-                current_checkpoint['obj'] = line.split(':', 1)[1].strip()
-        
-        if current_checkpoint:
-            checkpoints.append(current_checkpoint)
-        
-        # Ensure we have exactly 5 checkpoints
-        if len(checkpoints) < 5:
-            # Fallback to basic checkpoints
-            return [
-                {"topic": f"{topic} - Fundamentals", "obj": "Basic concepts, Core principles, Key terminology, Foundation, Overview"},
-                {"topic": f"{topic} - Core Concepts", "obj": "Main ideas, Essential components, Key mechanisms, Structure, Function"},
-                {"topic": f"{topic} - Advanced Topics", "obj": "Complex concepts, Advanced techniques, Optimization, Best practices, Edge cases"},
-                {"topic": f"{topic} - Applications", "obj": "Real-world use, Practical examples, Implementation, Case studies, Problem solving"},
-                {"topic": f"{topic} - Mastery", "obj": "Integration, Advanced applications, Troubleshooting, Performance, Expert level"}
-            ]
-        
-        return checkpoints[:5]
-    
+        return curriculum.generate_checkpoints(topic)
     except Exception as e:
         st.error(f"Error generating checkpoints: {str(e)}")
         return []
 
+# Headings shown when a node starts streaming its output
+NODE_LABELS = {
+    "gather_context": "📖 Study Material",
+    "generate_questions": "📝 Preparing Assessment",
+    "feynman_teaching": "🧠 Feynman Explanation"
+}
+
+def render_deltas(events):
+    """Turns {"node", "delta"} events into text for st.write_stream, with a heading per node"""
+    current_node = None
+    for event in events:
+        if not event.get("delta"):
+            continue
+        if event["node"] != current_node:
+            current_node = event["node"]
+            yield f"\n\n#### {NODE_LABELS.get(current_node, current_node)}\n\n"
+        yield event["delta"]
+
+def run_streamed(coro):
+    """Run a coroutine on the async runtime, rendering the LLM deltas it emits as they arrive"""
+    events = queue.Queue()
+    # The task inherits this learner's stream sink and LLM session ID
+    with stream_to(events.put):
+        future = run_async(coro)
+    future.add_done_callback(lambda _: events.put(None))
+    st.write_stream(render_deltas(iter(events.get, None)))
+    return future.result()
+
 def safe_invoke(input_state):
+    """Run the graph on the current checkpoint's thread, rendering LLM output as the nodes stream it"""
+    final_state = dict(input_state)
+
+    async def run_graph():
+        async for chunk in load_graph().astream(input_state, config=checkpoint_config(), stream_mode="values"):
+            final_state.clear()
+            final_state.update(chunk)
+
     try:
         with st.spinner("Processing..."):
-            return st.session_state.agent.invoke(input_state)
+            start = time.perf_counter()
+            run_streamed(run_graph())
+            print(f"--- [GRAPH] Completed in {time.perf_counter() - start:.2f}s ---")
+            return final_state
     except Exception as e:
         st.error(f"Error: {str(e)}")
         return input_state
@@ -123,7 +175,8 @@ if st.session_state.topic is None:
                     st.session_state.topic = user_topic
                     st.session_state.checkpoints = checkpoints
                     st.session_state.checkpoint_idx = 0
-                    st.session_state.state = None
+                    st.session_state.path_id = sessions.start_path(st.session_state.session_id, user_topic, checkpoints)
+                    st.session_state.prefetcher = make_prefetcher(checkpoints)
                     st.success(f"✅ Learning path created with {len(checkpoints)} checkpoints!")
                     st.rerun()
                 else:
@@ -142,10 +195,7 @@ if st.session_state.checkpoint_idx >= len(st.session_state.checkpoints):
     col1, col2, col3 = st.columns([1, 1, 1])
     with col2:
         if st.button("🔄 Start New Topic", use_container_width=True):
-            st.session_state.topic = None
-            st.session_state.checkpoints = []
-            st.session_state.checkpoint_idx = 0
-            st.session_state.state = None
+            reset_topic()
             st.rerun()
     st.stop()
 
@@ -166,16 +216,40 @@ with st.sidebar:
         elif i == st.session_state.checkpoint_idx:
             st.markdown(f"🎯 **{i+1}. {checkpoint['topic']}** *(Current)*")
         else:
-            st.markdown(f"🔒 {i+1}. {checkpoint['topic']}")
+            prefetch_status = st.session_state.prefetcher.status(i) if st.session_state.prefetcher else None
+            badge = {"ready": " ⚡ *ready*", "running": " ⏳ *preparing*", "queued": " 🕒 *queued*"}.get(prefetch_status, "")
+            st.markdown(f"🔒 {i+1}. {checkpoint['topic']}{badge}")
     
     st.markdown("---")
     if st.button("🔄 Change Topic"):
-        st.session_state.topic = None
-        st.session_state.checkpoints = []
-        st.session_state.checkpoint_idx = 0
-        st.session_state.state = None
+        reset_topic()
         st.rerun()
 
+    with st.expander("⚙️ System Status"):
+        st.caption("LLM queue")
+        st.json(get_scheduler().metrics())
+        st.caption("Search cache")
+        st.json(get_search_cache().cache_stats())
+        st.caption("Prompt context tokens")
+        st.json(prompt_stats())
+        st.caption("Time to first token")
+        st.json(ttft_stats())
+        if get_llm_cache():
+            st.caption("LLM response cache")
+            st.json(get_llm_cache().cache_stats())
+        if get_curriculum_store():
+            st.caption("Curriculum store")
+            st.json(get_curriculum_store().store_stats())
+        if get_question_bank():
+            st.caption("Question bank")
+            st.json(get_question_bank().bank_stats())
+        if get_single_flight():
+            st.caption("Single-flight")
+            st.json(get_single_flight().flight_stats())
+        if get_chroma_maintenance():
+            st.caption("Vector store GC")
+            st.json(get_chroma_maintenance().gc_stats())
+
 current_checkpoint = st.session_state.checkpoints[st.session_state.checkpoint_idx]
 
 # Current checkpoint info
@@ -183,21 +257,19 @@ st.markdown(f"### 📚 Checkpoint {st.session_state.checkpoint_idx + 1}: {curren
 st.info(f"**Learning Objectives:** {current_checkpoint['obj']}")
 st.markdown("---")
 
-# Initialize state for current checkpoint
-if st.session_state.state is None:
-    initial_input = {
-        "topic": current_checkpoint['topic'],
-        "objectives": current_checkpoint['obj'],
-        "gathered_context": "",
-        "relevance_score": 0,
-        "questions": [],
-        "learner_answers": "",
-        "understanding_score": 0,
-        "search_retry_count": 0
-    }
-    st.session_state.state = safe_invoke(initial_input)
-
-state = st.session_state.state
+# Load the current checkpoint's persisted state, using prefetched work when available
+state = load_state()
+if state is None:
+    prefetched = None
+    if st.session_state.prefetcher:
+        with st.spinner("Finishing prepared checkpoint..."):
+            prefetched = st.session_state.prefetcher.take(st.session_state.checkpoint_idx)
+    state = prefetched or safe_invoke(initial_state(current_checkpoint['topic'], current_checkpoint['obj']))
+
+# Prepare the next checkpoints while the learner studies this one
+if st.session_state.prefetcher:
+    st.session_state.prefetcher.schedule(st.session_state.checkpoint_idx)
+
 score = state.get("understanding_score", 0)
 
 # Study material - always show first before assessment
@@ -219,7 +291,8 @@ raw_q = str(questions[0]) if questions else ""
 is_feynman = "FEYNMAN_PHASE|" in raw_q
 
 # Show score and next actions if assessment was submitted
-if score > 0 and not is_feynman:
+graded = score > 0 or bool(state.get("question_results"))
+if graded and not is_feynman:
     st.markdown("---")
     
     if score >= 70:
@@ -231,7 +304,7 @@ if score > 0 and not is_feynman:
         with col2:
             if st.button("🎯 Next Checkpoint", use_container_width=True):
                 st.session_state.checkpoint_idx += 1
-                st.session_state.state = None
+                sessions.set_checkpoint(st.session_state.session_id, st.session_state.checkpoint_idx)
                 st.rerun()
     
     else:
@@ -241,7 +314,12 @@ if score > 0 and not is_feynman:
         st.markdown("#### 🔍 Performance Analysis")
         st.warning("You need more practice on this checkpoint. Let's review the concepts!")
         
-        if state.get("learner_answers"):
+        if state.get("question_results"):
+            st.markdown("**Your Answers:**")
+            for result in state["question_results"]:
+                mark = "✅" if result["is_correct"] else "❌"
+                st.markdown(f"{mark} Question {result['number']}: you chose **{result['selected'] or '-'}**, correct answer **{result['correct']}**")
+        elif state.get("learner_answers"):
             st.markdown("**Your Answers:**")
             st.code(state["learner_answers"])
         
@@ -250,9 +328,9 @@ if score > 0 and not is_feynman:
         col1, col2, col3 = st.columns([1, 1, 1])
         with col2:
             if st.button("🧠 Start Feynman Learning", use_container_width=True):
-                from src.nodes.feynman import feynman_teaching_node
-                feynman_result = feynman_teaching_node(state)
-                st.session_state.state.update(feynman_result)
+                from src.nodes.feynman import afeynman_teaching_node
+                feynman_result = run_streamed(afeynman_teaching_node(state))
+                load_graph().update_state(checkpoint_config(), feynman_result, as_node="feynman_teaching")
                 st.rerun()
 
 elif is_feynman:
@@ -268,10 +346,11 @@ elif is_feynman:
         state["questions"] = []
         state["learner_answers"] = ""
         state["understanding_score"] = 0
-        st.session_state.state = safe_invoke(state)
+        state["question_results"] = []
+        safe_invoke(state)
         st.rerun()
 
-elif questions and not is_feynman and score == 0:
+elif questions and not is_feynman and not graded:
     # Assessment mode - only show after study material
     st.markdown("### 📝 Knowledge Assessment")
     st.info("Answer all 5 questions based on the study material above.")
@@ -282,9 +361,8 @@ elif questions and not is_feynman and score == 0:
     with st.form("quiz"):
         user_answers = []
         
-        # Split questions by number pattern
-        import re
-        question_blocks = re.split(r'\n(?=\d+\.)', questions_text.strip())
+        # Split questions by number pattern (same split the grader uses)
+        question_blocks = split_questions(questions_text)
         
         for i, block in enumerate(question_blocks[:5], 1):  # Ensure only 5 questions
             if block.strip():
@@ -326,5 +404,5 @@ elif questions and not is_feynman and score == 0:
             # Format answers as "1.A, 2.B, 3.C, 4.D, 5.E"
             formatted_answers = ", ".join(user_answers)
             state["learner_answers"] = formatted_answers
-            st.session_state.state = safe_invoke(state)
+            safe_invoke(state)
             st.rerun()
@@ -0,0 +1,224 @@
+"""Benchmark Fakes - Deterministic stand-ins for ChatGroq, DDGS and the embedding model"""
+import asyncio
+import hashlib
+import re
+import sys
+import time
+import types
+import numpy as np
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+CHECKPOINTS_FIXTURE = "\n".join(
+    f"CHECKPOINT_{i}: Stage {i}\nOBJECTIVES_{i}: Concept {i}a, Concept {i}b, Concept {i}c, Concept {i}d, Concept {i}e\n"
+    for i in range(1, 6)
+)
+
+STUDY_GUIDE_FIXTURE = """## Study Guide
+
+### Key Concepts
+- Neurons and weights make up every layer.
+- Gradient descent minimises the loss.
+- Overfitting hurts generalisation badly.
+- Neural networks are layers of connected neurons whose weights are learned from data.
+- Gradient descent repeatedly adjusts weights to reduce the loss function.
+- Overfitting happens when a model memorises the training data instead of generalising.
+
+### Detailed Explanation
+Training feeds examples forward through the network, measures the loss, and propagates
+gradients backwards to update every weight. Regularisation and validation data keep the
+model honest.
+
+### Important Points
+- Learning rate controls the size of each update.
+- More data usually beats a bigger model.
+"""
+
+MCQ_FIXTURE = "\n\n".join(
+    f"{i}. Which statement about concept {i} is correct?\n"
+    f"   A) Option one\n   B) Option two\n   C) Option three\n   D) Option four\n"
+    f"   ANSWER: {'ABCDA'[i - 1]}"
+    for i in range(1, 6)
+)
+
+def mcq_fixture(prompt):
+    """MCQ_FIXTURE for a plain quiz; distinct questions for batched or de-duplicated requests"""
+    match = re.search(r"EXACTLY (\d+) Multiple", prompt)
+    count = int(match.group(1)) if match else 5
+    if count == 5 and "Do NOT repeat" not in prompt:
+        return MCQ_FIXTURE
+    salt = hashlib.md5(prompt.encode()).hexdigest()
+    return "\n\n".join(
+        f"{i}. Which statement about concept {salt[:6]}{i} is correct?\n"
+        f"   A) Option one\n   B) Option two\n   C) Option three\n   D) Option four\n"
+        f"   ANSWER: {'ABCD'[i % 4]}"
+        for i in range(1, count + 1)
+    )
+
+FEYNMAN_FIXTURE = """## 🧠 Feynman Learning
+
+### 🎯 Step 1: Simple Explanation
+A neural network is like a team of tiny judges who vote and learn from their mistakes.
+
+### 🔍 Step 2: Identify Knowledge Gaps
+- Gap 1: How weights change during training
+
+### 🎨 Step 3: Use Analogies & Examples
+- **Analogy 1:** Tuning a guitar string by ear
+
+### 🔄 Step 4: Simplify & Review
+1. Data in
+2. Guess out
+3. Fix the guess
+
+### 📝 Step 5: Test Understanding
+What happens to the weights after a wrong guess?
+"""
+
+# (prompt keyword, response or response(prompt)) pairs checked in order; first match wins
+DEFAULT_FIXTURES = [
+    ("learning path designer", CHECKPOINTS_FIXTURE),
+    ("Multiple Choice Questions", mcq_fixture),
+    ("Feynman Technique", FEYNMAN_FIXTURE),
+    ("FINAL_PERCENTAGE", "Graded.\nFINAL_PERCENTAGE: 60"),
+    ("FINAL_SCORE", "The context covers the objectives.\nFINAL_SCORE: 4"),
+    ("study material", STUDY_GUIDE_FIXTURE),
+]
+
+class FakeChatModel:
+    """Stand-in for ChatGroq with fixed latency and keyword-matched fixture responses"""
+
+    model_name = "fake-llm"
+    temperature = 1e-08
+    max_tokens = None
+
+    def __init__(self, latency=0.05, stream_chunks=20, fixtures=None):
+        self.latency = latency
+        self.stream_chunks = stream_chunks
+        self.fixtures = fixtures or DEFAULT_FIXTURES
+        self.calls = 0
+
+    def _respond(self, prompt):
+        """Picks the fixture for a prompt"""
+        text = str(prompt)
+        for keyword, response in self.fixtures:
+            if keyword in text:
+                return response(text) if callable(response) else response
+        return "OK"
+
+    def _usage(self, prompt, response):
+        prompt_tokens = max(1, len(str(prompt)) // 4)
+        completion_tokens = max(1, len(response) // 4)
+        return {"input_tokens": prompt_tokens, "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        response = self._respond(prompt)
+        return AIMessage(content=response, usage_metadata=self._usage(prompt, response))
+
+    def stream(self, prompt, **kwargs):
+        """Spends a fifth of the latency before the first chunk, the rest spread across chunks"""
+        self.calls += 1
+        response = self._respond(prompt)
+        size = max(1, len(response) // self.stream_chunks)
+        pieces = [response[i:i + size] for i in range(0, len(response), size)]
+        time.sleep(self.latency * 0.2)
+        for piece in pieces:
+            yield AIMessageChunk(content=piece)
+            time.sleep(self.latency * 0.8 / len(pieces))
+
+    async def ainvoke(self, prompt, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        response = self._respond(prompt)
+        return AIMessage(content=response, usage_metadata=self._usage(prompt, response))
+
+    async def astream(self, prompt, **kwargs):
+        self.calls += 1
+        response = self._respond(prompt)
+        size = max(1, len(response) // self.stream_chunks)
+        pieces = [response[i:i + size] for i in range(0, len(response), size)]
+        await asyncio.sleep(self.latency * 0.2)
+        for piece in pieces:
+            yield AIMessageChunk(content=piece)
+            await asyncio.sleep(self.latency * 0.8 / len(pieces))
+
+class FakeDDGS:
+    """Stand-in for ddgs.DDGS returning deterministic results after a fixed latency"""
+
+    latency = 0.1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def text(self, query, max_results=8):
+        time.sleep(self.latency)
+        for i in range(max_results):
+            yield {
+                "title": f"{query} result {i}",
+                "href": f"https://example.com/{hashlib.md5(query.encode()).hexdigest()[:8]}/{i}",
+                "body": (
+                    f"Result {i} about {query}. Neural networks learn weights with gradient descent. "
+                    f"Overfitting is reduced with regularisation and validation data. Item {i} explains "
+                    f"concept {i} with an example."
+                ),
+            }
+
+class FakeEmbeddingFunction:
+    """Deterministic hashed bag-of-words embeddings with optional per-text latency"""
+
+    def __init__(self, dim=384, latency_per_text=0.0):
+        self.dim = dim
+        self.latency_per_text = latency_per_text
+
+    def __call__(self, input):
+        if self.latency_per_text:
+            time.sleep(self.latency_per_text * len(input))
+        vectors = []
+        for text in input:
+            vector = np.zeros(self.dim, dtype=np.float32)
+            for word in str(text).lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+            norm = np.linalg.norm(vector)
+            vectors.append(vector / norm if norm else vector)
+        return vectors
+
+    # Chroma's embedding-function protocol
+    @staticmethod
+    def name():
+        return "benchmark-fake"
+
+    def get_config(self):
+        return {"dim": self.dim}
+
+    @staticmethod
+    def build_from_config(config):
+        return FakeEmbeddingFunction(dim=config.get("dim", 384))
+
+    def is_legacy(self):
+        return False
+
+def install_fakes(llm_latency=0.05, search_latency=0.1, embed_latency=0.0, chroma_path=None):
+    """Swaps the real LLM client, search backend and embedding model for fakes
+
+    Returns the FakeChatModel so callers can inspect call counts.
+    """
+    import src.resources as resources
+    import src.utils as utils
+
+    fake_ddgs = types.ModuleType("ddgs")
+    FakeDDGS.latency = search_latency
+    fake_ddgs.DDGS = FakeDDGS
+    sys.modules["ddgs"] = fake_ddgs
+
+    llm = FakeChatModel(latency=llm_latency)
+    utils._client = llm
+    resources._embedding_fn = FakeEmbeddingFunction(latency_per_text=embed_latency)
+    if chroma_path:
+        resources.CHROMA_PATH = chroma_path
+        resources._chroma_client = None
+    return llm
@@ -0,0 +1,250 @@
+"""Load Generator - Simulated concurrent learners driving the app's graph path with stubbed backends
+
+Each learner walks the same calls app.py makes: learning path -> study
+material and quiz -> failing submission -> Feynman explanation -> retake ->
+passing submission, for one or more checkpoints. All learners share one
+process, one compiled graph with its SQLite checkpointer and the async
+runtime, as the Streamlit server does. Concurrency is ramped through the
+given levels.
+
+Usage:
+    python -m benchmarks.load --learners 1,4,16 --checkpoints 2 --profile groq
+    python -m benchmarks.load --learners 32 --ramp-seconds 10 --output load_results.json
+    python -m benchmarks.load --learners 16 --same-topic  # single-flight coalescing
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from benchmarks.run import PROJECT_ROOT, check_thresholds, configure_environment, summarize
+
+# Stubbed backend latencies in seconds: (LLM call, web search)
+LATENCY_PROFILES = {
+    "fast": (0.05, 0.1),
+    "groq": (0.8, 0.6),
+    "slow": (3.0, 1.5),
+}
+STEPS = ("path", "study", "submit_fail", "feynman", "retake", "submit_pass")
+
+class RSSSampler:
+    """Background thread tracking the peak resident memory while active"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        from src.resources import _resident_memory_mb
+
+        self._read = _resident_memory_mb
+        self.peak = self._read()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = self._read()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+def _answers(answer_key, correct):
+    """Learner answers that get every question right or every question wrong"""
+    letters = "ABCD"
+    return ", ".join(
+        f"{i}.{letter if correct else letters[(letters.index(letter) + 1) % 4]}"
+        for i, letter in enumerate(answer_key, 1)
+    )
+
+async def _run_graph(graph, state, config):
+    """One graph run the way app.safe_invoke does it: astream the values, keep the last"""
+    final_state = dict(state)
+    async for chunk in graph.astream(state, config=config, stream_mode="values"):
+        final_state = chunk
+    return final_state
+
+async def simulate_learner(graph, learner_id, topic, checkpoints, timings, think_time=0.0):
+    """Drives one learner through the app's flow, appending (step, seconds) to timings"""
+    from src import curriculum
+    from src.graph import thread_config
+    from src.nodes.feynman import afeynman_teaching_node
+    from src.scheduler import set_session
+    from src.state import initial_state
+    from src.utils import stream_to
+
+    set_session(learner_id)  # Fair LLM queueing across learners, as in the app
+    delivered = []
+
+    async def step(name, coro):
+        start = time.perf_counter()
+        result = await coro
+        timings[name].append(time.perf_counter() - start)
+        if think_time:
+            await asyncio.sleep(think_time)
+        return result
+
+    # Token deltas go to a per-learner sink, like the app's render queue
+    with stream_to(delivered.append):
+        path = await step("path", asyncio.to_thread(curriculum.generate_checkpoints, topic))
+        for idx, checkpoint in enumerate(path[:checkpoints]):
+            config = thread_config(learner_id, "load", idx)
+            state = await step("study", _run_graph(graph, initial_state(checkpoint["topic"], checkpoint["obj"]), config))
+            state = await step("submit_fail", _run_graph(
+                graph, {**state, "learner_answers": _answers(state["answer_key"], correct=False)}, config
+            ))
+
+            async def feynman(state=state, config=config):
+                result = await afeynman_teaching_node(state)
+                await graph.aupdate_state(config, result, as_node="feynman_teaching")
+                return {**state, **result}
+
+            state = await step("feynman", feynman())
+            retake = {**state, "questions": [], "learner_answers": "", "understanding_score": 0, "question_results": []}
+            state = await step("retake", _run_graph(graph, retake, config))
+            await step("submit_pass", _run_graph(
+                graph, {**state, "learner_answers": _answers(state["answer_key"], correct=True)}, config
+            ))
+    return len(delivered)
+
+async def run_level(graph, learners, checkpoints, ramp_seconds, think_time, level_tag, same_topic=False):
+    """Runs learners concurrently, starting them evenly over ramp_seconds (all on one topic if same_topic)"""
+    timings = defaultdict(list)
+    failures = []
+
+    async def learner(i):
+        if ramp_seconds and learners > 1:
+            await asyncio.sleep(ramp_seconds * i / (learners - 1))
+        try:
+            await simulate_learner(graph, f"load-{level_tag}-{i}", f"Load Topic {level_tag}" if same_topic else f"Load Topic {level_tag} {i}",
+                                   checkpoints, timings, think_time)
+        except Exception as e:
+            failures.append(f"{type(e).__name__}: {e}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(learner(i) for i in range(learners)))
+    return timings, failures, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-learner load test with stubbed LLM and search backends")
+    parser.add_argument("--learners", default="1,4,16", help="Comma-separated concurrency levels to ramp through")
+    parser.add_argument("--checkpoints", type=int, default=1, help="Checkpoints each learner completes")
+    parser.add_argument("--profile", choices=sorted(LATENCY_PROFILES), default="fast", help="Stubbed latency profile")
+    parser.add_argument("--llm-latency", type=float, help="Seconds per fake LLM call (overrides --profile)")
+    parser.add_argument("--search-latency", type=float, help="Seconds per fake web search (overrides --profile)")
+    parser.add_argument("--ramp-seconds", type=float, default=0.0, help="Spread learner starts over this many seconds")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds a learner pauses after each step")
+    parser.add_argument("--same-topic", action="store_true", help="All learners of a level study one topic")
+    parser.add_argument("--llm-concurrency", type=int, default=64, help="LLM calls in flight (LLM_MAX_CONCURRENCY)")
+    parser.add_argument("--output", default="load_results.json", help="Where to write machine-readable results")
+    parser.add_argument("--thresholds", default="", help="JSON of limits per 'load.<learners>.<step>' (exit 1 on regression)")
+    args = parser.parse_args(argv)
+
+    llm_latency, search_latency = LATENCY_PROFILES[args.profile]
+    llm_latency = llm_latency if args.llm_latency is None else args.llm_latency
+    search_latency = search_latency if args.search_latency is None else args.search_latency
+
+    workdir = tempfile.mkdtemp(prefix="alearn-load-")
+    configure_environment(workdir)
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.llm_concurrency)
+    os.environ["GRAPH_CHECKPOINT_PATH"] = os.path.join(workdir, "graph_checkpoints.db")
+    os.environ["PREFETCH_LOOKAHEAD"] = "0"
+    sys.path.insert(0, PROJECT_ROOT)
+
+    from benchmarks.fakes import install_fakes
+    fake_llm = install_fakes(llm_latency=llm_latency, search_latency=search_latency,
+                             chroma_path=os.path.join(workdir, "chroma_db"))
+    from src.aio import run_async
+    from src.graph import get_shared_graph
+    from src.resources import _resident_memory_mb, preload
+    from src.singleflight import get_single_flight
+
+    graph = get_shared_graph()
+    preload()
+    # One untimed learner warms imports, caches and the checkpointer
+    run_async(run_level(graph, 1, 1, 0, 0, "warmup")).result()
+
+    results, levels = {}, []
+    for learners in [int(n) for n in args.learners.split(",") if n]:
+        print(f"--- [LOAD] {learners} learners ---")
+        baseline = _resident_memory_mb()
+        with RSSSampler() as sampler:
+            timings, failures, elapsed = run_async(
+                run_level(graph, learners, args.checkpoints, args.ramp_seconds, args.think_time, learners, args.same_topic)
+            ).result()
+
+        for name in STEPS:
+            if timings.get(name):
+                results[f"load.{learners}.{name}"] = summarize(timings[name])
+        flows = learners - len(failures)
+        level = {
+            "learners": learners,
+            "elapsed_s": round(elapsed, 2),
+            "learners_per_min": round(flows / elapsed * 60, 1),
+            "steps_per_s": round(sum(len(t) for t in timings.values()) / elapsed, 2),
+            "failures": failures[:10],
+            "baseline_rss_mb": baseline,
+            "peak_rss_mb": sampler.peak,
+        }
+        if baseline is not None and sampler.peak is not None:
+            level["per_session_mb"] = round(max(0.0, sampler.peak - baseline) / learners, 2)
+        levels.append(level)
+        print(f"--- [LOAD] {learners} learners: {level['learners_per_min']} learners/min, "
+              f"peak RSS {level['peak_rss_mb']} MB, {len(failures)} failures ---")
+
+    thresholds = {}
+    if args.thresholds:
+        with open(args.thresholds) as f:
+            thresholds = json.load(f)
+    regressions = check_thresholds(results, thresholds)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "profile": args.profile,
+            "llm_latency_s": llm_latency,
+            "search_latency_s": search_latency,
+            "checkpoints": args.checkpoints,
+            "ramp_seconds": args.ramp_seconds,
+            "think_time_s": args.think_time,
+            "same_topic": args.same_topic,
+            "llm_concurrency": args.llm_concurrency,
+            "fake_llm_calls": fake_llm.calls,
+        },
+        "levels": levels,
+        "single_flight": get_single_flight().flight_stats() if get_single_flight() else None,
+        "results": results,
+        "regressions": regressions,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'step':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in results.items():
+        print(f"{name:<26}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    for level in levels:
+        print(f"{level['learners']:>4} learners: {level['learners_per_min']:>8} learners/min  "
+              f"{level['steps_per_s']:>7} steps/s  peak RSS {level['peak_rss_mb']} MB  "
+              f"per session {level.get('per_session_mb')} MB  failures {len(level['failures'])}")
+    for regression in regressions:
+        print(f"REGRESSION {regression['benchmark']} {regression['metric']}={regression['value']} > {regression['limit']}")
+    print(f"Results written to {args.output}")
+    return 1 if regressions or any(level["failures"] for level in levels) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""Benchmark Runner - Offline timings for nodes, graph runs, RAG and startup with regression thresholds
+
+Usage:
+    python -m benchmarks.run --iterations 5 --output bench_results.json
+    python -m benchmarks.run --thresholds benchmarks/thresholds.json   # exits 1 on regression
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(__file__), "thresholds.json")
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def configure_environment(workdir):
+    """Points caches at a scratch directory and lifts rate limits so only the work itself is timed"""
+    os.environ["GROQ_API_KEY"] = "gsk_benchmark"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["CURRICULUM_STORE_ENABLED"] = "false"
+    os.environ["QUESTION_BANK_ENABLED"] = "false"
+    os.environ["SEARCH_CACHE_PATH"] = os.path.join(workdir, "search_cache.db")
+    os.environ["SEARCH_CACHE_TTL"] = "0"
+    os.environ["SEARCH_CACHE_STALE_TTL"] = "0"
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = "0"
+    os.environ["LLM_TOKENS_PER_MINUTE"] = "0"
+    os.environ["LLM_MAX_CONCURRENCY"] = "64"
+
+def summarize(samples):
+    """Latency statistics in milliseconds"""
+    ordered = sorted(samples)
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+    return {
+        "iterations": len(samples),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "p50_ms": round(pct(0.50) * 1000, 3),
+        "p95_ms": round(pct(0.95) * 1000, 3),
+        "p99_ms": round(pct(0.99) * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+def measure(fn, iterations, warmup=1):
+    """Times fn() over iterations after warmup runs"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def bench_nodes(iterations):
+    """Times each graph node in isolation on fixture state"""
+    from benchmarks.fakes import MCQ_FIXTURE, STUDY_GUIDE_FIXTURE
+    from src.quiz import parse_question_set
+    from src.state import initial_state
+    from src.nodes.gatherer import gather_context_node
+    from src.nodes.validator import validate_context_node
+    from src.nodes.question_generator import generate_questions_node
+    from src.nodes.verifier import verify_understanding_node
+    from src.nodes.feynman import feynman_teaching_node
+
+    questions_text, answer_key = parse_question_set(MCQ_FIXTURE)
+    state = initial_state("Neural Networks", "neurons and weights, gradient descent, overfitting")
+    studied = {**state, "gathered_context": STUDY_GUIDE_FIXTURE, "relevance_score": 5}
+    quizzed = {**studied, "questions": [questions_text], "answer_key": answer_key,
+               "learner_answers": "1.A, 2.A, 3.A, 4.A, 5.A"}
+    graded = {**quizzed, **verify_understanding_node(quizzed)}
+
+    return {
+        "node.gather_context": measure(lambda: gather_context_node(state), iterations),
+        "node.validate_context": measure(lambda: validate_context_node(studied), iterations),
+        "node.generate_questions": measure(lambda: generate_questions_node(studied), iterations),
+        "node.verify_understanding": measure(lambda: verify_understanding_node(quizzed), iterations),
+        "node.feynman_teaching": measure(lambda: feynman_teaching_node(graded), iterations),
+    }
+
+def bench_graph(iterations):
+    """Times full graph runs: a fresh checkpoint, a passing submission and a failing one"""
+    from src.graph import create_graph
+    from src.state import initial_state
+
+    # Failing submissions teach in the graph, so submit_fail covers Feynman teaching and the retake quiz
+    graph = create_graph(teach=True)
+    prepared = graph.invoke(initial_state("Neural Networks", "neurons and weights, gradient descent, overfitting"))
+    passing = {**prepared, "learner_answers": "1.A, 2.B, 3.C, 4.D, 5.A"}
+    failing = {**prepared, "learner_answers": "1.D, 2.D, 3.D, 4.A, 5.D"}
+
+    return {
+        "graph.new_checkpoint": measure(
+            lambda: graph.invoke(initial_state("Neural Networks", "neurons and weights, gradient descent, overfitting")),
+            iterations
+        ),
+        "graph.submit_pass": measure(lambda: graph.invoke(dict(passing)), iterations),
+        "graph.submit_fail": measure(lambda: graph.invoke(dict(failing)), iterations),
+        "graph.submit_fail_banked": bench_banked_retake(graph, failing, iterations),
+        **bench_async_graph(graph, iterations),
+    }
+
+def bench_async_graph(graph, iterations, learners=8):
+    """Times ainvoke for one learner and for several learners' new checkpoints sharing the event loop"""
+    import asyncio
+    from src.aio import run_async
+    from src.state import initial_state
+
+    objectives = "neurons and weights, gradient descent, overfitting"
+
+    async def concurrent():
+        await asyncio.gather(*(
+            graph.ainvoke(initial_state(f"Neural Networks {i}", objectives)) for i in range(learners)
+        ))
+
+    return {
+        "graph.async_new_checkpoint": measure(
+            lambda: run_async(graph.ainvoke(initial_state("Neural Networks", objectives))).result(), iterations
+        ),
+        f"graph.async_concurrent_{learners}": measure(lambda: run_async(concurrent()).result(), iterations),
+    }
+
+def bench_banked_retake(graph, failing, iterations):
+    """Times a failing submission whose retake quiz is drawn from a filled question bank"""
+    from src.curriculum_store import questions_key
+    from src.question_bank import get_question_bank
+
+    os.environ["QUESTION_BANK_ENABLED"] = "true"
+    try:
+        bank = get_question_bank()
+        graph.invoke(dict(failing))  # Seeds the bank and starts a top-up
+        bank.wait_for_top_up(questions_key(failing["gathered_context"]))
+        return measure(lambda: graph.invoke(dict(failing)), iterations)
+    finally:
+        os.environ["QUESTION_BANK_ENABLED"] = "false"
+
+def bench_rag(iterations, corpus_sizes, backends):
+    """Times RAGManager ingestion and objective retrieval per vector backend at several corpus sizes
+
+    add results also carry the resident memory growth during ingestion.
+    """
+    from src.rag import RAGManager
+    from src.resources import _resident_memory_mb
+
+    results = {}
+    objectives = ["neurons and weights", "gradient descent", "overfitting", "activation functions", "loss"]
+    for backend in backends:
+        for size in corpus_sizes:
+            rag = RAGManager(collection_name=f"benchmark_corpus_{size}", backend=backend)
+            rag.clear_collection()
+            documents = [
+                f"Document {i} discusses topic {i % 37}. It covers neurons, weights and gradient step {i}. "
+                f"Regularisation note {i % 11} mentions overfitting and loss curve {i}."
+                for i in range(size)
+            ]
+            rss_before = _resident_memory_mb()
+            start = time.perf_counter()
+            rag.add_documents(documents)
+            add = summarize([time.perf_counter() - start])
+            rss_after = _resident_memory_mb()
+            if rss_before is not None and rss_after is not None:
+                add["rss_delta_mb"] = round(rss_after - rss_before, 1)
+            results[f"rag.{backend}.add.{size}"] = add
+            results[f"rag.{backend}.retrieve.{size}"] = measure(
+                lambda: rag.retrieve_for_objectives(objectives, token_budget=625), iterations
+            )
+            rag.store.drop()
+    return results
+
+def bench_startup(iterations):
+    """Cold start (fresh interpreter importing the graph) vs warm create_graph() in this process
+
+    startup.first_paint_imports times app.py's module-level project imports
+    in a fresh interpreter; its threshold is the cold-start import budget.
+    """
+    from benchmarks.startup import first_paint_modules, profile_imports
+
+    first_paint = [profile_imports(first_paint_modules())[0] for _ in range(iterations)]
+    code = (
+        "import time; start = time.perf_counter(); "
+        "from src.graph import create_graph; create_graph(); "
+        "print(time.perf_counter() - start)"
+    )
+    samples = []
+    for _ in range(iterations):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+
+    from src.graph import create_graph
+    return {
+        "startup.first_paint_imports": summarize(first_paint),
+        "startup.cold_import_and_compile": summarize(samples),
+        "startup.warm_compile": measure(create_graph, iterations),
+    }
+
+def check_thresholds(results, thresholds):
+    """Returns a list of regressions: results whose p95 exceeds the configured limit"""
+    regressions = []
+    for name, limits in thresholds.items():
+        if name.startswith("_") or name not in results:
+            continue
+        for metric, limit in limits.items():
+            value = results[name].get(metric)
+            if value is not None and value > limit:
+                regressions.append({"benchmark": name, "metric": metric, "value": value, "limit": limit})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline performance benchmarks with stub LLM and search backends")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--llm", choices=["fake", "local"], default="fake",
+                        help="fake: fixture responses with --llm-latency; local: the offline extractive provider")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--search-latency", type=float, default=0.1, help="Seconds per fake web search")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="Seconds per embedded text")
+    parser.add_argument("--corpus-sizes", default="100,1000", help="Comma-separated RAG corpus sizes")
+    parser.add_argument("--backends", default="memory,chroma", help="Comma-separated vector backends to benchmark")
+    parser.add_argument("--only", default="nodes,graph,rag,startup", help="Comma-separated suites to run")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write machine-readable results")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS, help="JSON of per-benchmark limits ('' to skip)")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="alearn-bench-")
+    configure_environment(workdir)
+    if args.llm == "local":
+        os.environ["LLM_PROVIDER"] = "local"
+    sys.path.insert(0, PROJECT_ROOT)
+
+    from benchmarks.fakes import install_fakes
+    fake_llm = install_fakes(
+        llm_latency=args.llm_latency,
+        search_latency=args.search_latency,
+        embed_latency=args.embed_latency,
+        chroma_path=os.path.join(workdir, "chroma_db")
+    )
+
+    suites = {
+        "nodes": lambda: bench_nodes(args.iterations),
+        "graph": lambda: bench_graph(args.iterations),
+        "rag": lambda: bench_rag(
+            args.iterations, [int(n) for n in args.corpus_sizes.split(",") if n], args.backends.split(",")
+        ),
+        "startup": lambda: bench_startup(args.iterations),
+    }
+    results = {}
+    for name in args.only.split(","):
+        print(f"--- [BENCHMARK] {name} ---")
+        results.update(suites[name.strip()]())
+
+    thresholds = {}
+    if args.thresholds:
+        with open(args.thresholds) as f:
+            thresholds = json.load(f)
+    regressions = check_thresholds(results, thresholds)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "llm": args.llm,
+            "llm_latency_s": args.llm_latency,
+            "search_latency_s": args.search_latency,
+            "embed_latency_s": args.embed_latency,
+            "fake_llm_calls": fake_llm.calls,
+        },
+        "results": results,
+        "regressions": regressions,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    width = max(len(name) for name in results) if results else 0
+    for name, stats in results.items():
+        print(f"{name:<{width}}  p50 {stats['p50_ms']:>10.2f} ms  p95 {stats['p95_ms']:>10.2f} ms")
+    for regression in regressions:
+        print(f"REGRESSION {regression['benchmark']} {regression['metric']}={regression['value']} > {regression['limit']}")
+    print(f"Results written to {args.output}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Startup Profiler - Import-time breakdown of what app.py loads before its first paint
+
+Usage:
+    python -m benchmarks.startup               # top packages by import time
+    python -m benchmarks.startup --top 40 --modules src.graph
+"""
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def first_paint_modules(app_path=os.path.join(PROJECT_ROOT, "app.py")):
+    """Project modules app.py imports at module level, i.e. before the topic form can render"""
+    with open(app_path) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module and node.module.split(".")[0] == "src":
+            names = [f"{node.module}.{alias.name}" for alias in node.names] if node.module == "src" else [node.module]
+            modules.extend(names)
+        elif isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names if alias.name.split(".")[0] == "src")
+    return list(dict.fromkeys(modules))
+
+def profile_imports(modules):
+    """Imports modules in a fresh interpreter with -X importtime
+
+    Returns (seconds, {top-level package: self-time seconds}) where seconds
+    is the wall time of the imports alone, excluding interpreter startup.
+    """
+    code = (
+        "import time; start = time.perf_counter()\n"
+        + "".join(f"import {module}\n" for module in modules)
+        + "print(time.perf_counter() - start)"
+    )
+    env = {**os.environ, "GROQ_API_KEY": os.getenv("GROQ_API_KEY") or "gsk_profile"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True, env=env
+    )
+    packages = defaultdict(float)
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            packages[match.group(4).split(".")[0]] += int(match.group(1)) / 1e6
+    return float(result.stdout.strip().splitlines()[-1]), dict(packages)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time breakdown of app startup")
+    parser.add_argument("--modules", help="Comma-separated modules to import (default: app.py's project imports)")
+    parser.add_argument("--top", type=int, default=20, help="Packages to list")
+    args = parser.parse_args(argv)
+
+    modules = args.modules.split(",") if args.modules else first_paint_modules()
+    total, packages = profile_imports(modules)
+    print(f"--- [STARTUP] Importing {len(modules)} modules took {total * 1000:.1f} ms ---")
+    for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<30} {seconds * 1000:>9.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
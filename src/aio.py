@@ -0,0 +1,53 @@
+"""Async Runtime - One background event loop per process for async graph runs
+
+Sync callers (Streamlit script threads, the batch runner) hand coroutines
+to the shared loop, so many learners' LLM, search and RAG waits interleave
+on one loop instead of each holding a thread for a whole graph run.
+"""
+import asyncio
+import contextvars
+import queue
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+_DONE = object()
+
+def get_loop():
+    """Returns the process-wide event loop, starting its thread on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-runtime", daemon=True).start()
+                _loop = loop
+    return _loop
+
+def run_async(coro):
+    """Schedules coro on the shared loop with the caller's context variables; returns a concurrent Future"""
+    ctx = contextvars.copy_context()
+
+    async def with_context():
+        # Carry e.g. the LLM session ID and stream sink into the task
+        for var, value in ctx.items():
+            var.set(value)
+        return await coro
+
+    return asyncio.run_coroutine_threadsafe(with_context(), get_loop())
+
+def iterate_async(agen):
+    """Consumes an async iterator on the shared loop, yielding its items to a sync caller"""
+    items = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put(item)
+        finally:
+            items.put(_DONE)
+
+    future = run_async(pump())
+    while (item := items.get()) is not _DONE:
+        yield item
+    future.result()  # Re-raise errors from the iterator
@@ -0,0 +1,160 @@
+"""Batch Runner - Pre-generates learning paths, study material and quizzes for many topics
+
+Usage:
+    python -m src.batch topics.txt --output curricula.jsonl --concurrency 8
+
+Results are appended to the output JSONL as they complete, so an interrupted
+run resumes where it left off when started again with the same output file.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from src.curriculum import generate_checkpoints
+from src.nodes.gatherer import gather_failed
+from src.scheduler import get_scheduler, set_session
+from src.state import initial_state
+
+def load_topics(path):
+    """Reads one topic per line, skipping blanks, comments and duplicates"""
+    topics = []
+    with open(path) as f:
+        for line in f:
+            topic = line.strip()
+            if topic and not topic.startswith("#") and topic not in topics:
+                topics.append(topic)
+    return topics
+
+def load_progress(output_path):
+    """Returns ({topic: checkpoints}, {(topic, index)}) already recorded in the output file"""
+    paths, done = {}, set()
+    if not os.path.exists(output_path):
+        return paths, done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial line from a crash
+            if record.get("type") == "path":
+                paths[record["topic"]] = record["checkpoints"]
+            elif record.get("type") == "checkpoint":
+                done.add((record["topic"], record["index"]))
+    return paths, done
+
+def _build_path(topic):
+    """Worker: generates the checkpoint list for a topic"""
+    set_session(f"batch:{topic}")
+    return generate_checkpoints(topic)
+
+def _build_checkpoint(graph, topic, checkpoint):
+    """Worker: runs gather -> validate -> generate_questions for one checkpoint"""
+    set_session(f"batch:{topic}")
+    return graph.invoke(initial_state(checkpoint['topic'], checkpoint['obj']))
+
+def run_batch(topics, output_path, concurrency=4, graph=None):
+    """Generates curricula for all topics with bounded concurrency; returns a summary dict"""
+    if graph is None:
+        from src.graph import create_graph
+        graph = create_graph()
+
+    paths, done = load_progress(output_path)
+    tokens_before = get_scheduler().metrics()["tokens_total"]
+    start = time.perf_counter()
+    stats = {"topics": len(topics), "topics_completed": 0, "checkpoints_completed": 0,
+             "topics_skipped": 0, "checkpoints_skipped": 0, "failures": 0}
+    remaining = {}  # topic -> checkpoints still in flight
+
+    with open(output_path, "a") as out, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        def write(record):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+        pending = {}
+
+        def queue_checkpoints(topic, checkpoints):
+            todo = [i for i in range(len(checkpoints)) if (topic, i) not in done]
+            stats["checkpoints_skipped"] += len(checkpoints) - len(todo)
+            remaining[topic] = len(todo)
+            if not todo:
+                stats["topics_skipped"] += 1  # Finished in an earlier run
+            for i in todo:
+                future = pool.submit(_build_checkpoint, graph, topic, checkpoints[i])
+                pending[future] = ("checkpoint", topic, i, checkpoints[i], time.perf_counter())
+
+        for topic in topics:
+            if topic in paths:
+                queue_checkpoints(topic, paths[topic])
+            else:
+                pending[pool.submit(_build_path, topic)] = ("path", topic, None, None, time.perf_counter())
+
+        finished = 0
+        while pending:
+            completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in completed:
+                kind, topic, index, checkpoint, started = pending.pop(future)
+                elapsed = time.perf_counter() - started
+                finished += 1
+                try:
+                    result = future.result()
+                except Exception as e:
+                    stats["failures"] += 1
+                    write({"type": "failure", "stage": kind, "topic": topic, "index": index, "error": str(e)})
+                    print(f"[{finished}] FAILED {kind} {topic!r} #{index}: {e}")
+                    continue
+
+                if kind == "path":
+                    if not result:
+                        stats["failures"] += 1
+                        write({"type": "failure", "stage": kind, "topic": topic, "index": None, "error": "no checkpoints"})
+                        continue
+                    write({"type": "path", "topic": topic, "checkpoints": result})
+                    print(f"[{finished}] path {topic!r}: {len(result)} checkpoints ({elapsed:.1f}s)")
+                    queue_checkpoints(topic, result)
+                elif gather_failed(result.get("gathered_context")):
+                    # Not recorded as done, so the next run retries it
+                    stats["failures"] += 1
+                    write({"type": "failure", "stage": "gather", "topic": topic, "index": index,
+                           "error": result.get("gathered_context") or "no context"})
+                    print(f"[{finished}] FAILED gather {topic!r} #{index}: no study material")
+                else:
+                    write({
+                        "type": "checkpoint", "topic": topic, "index": index, "checkpoint": checkpoint,
+                        "gathered_context": result.get("gathered_context", ""),
+                        "relevance_score": result.get("relevance_score", 0),
+                        "questions": result.get("questions", []),
+                        "answer_key": result.get("answer_key", []),
+                    })
+                    stats["checkpoints_completed"] += 1
+                    remaining[topic] -= 1
+                    if remaining[topic] == 0:
+                        stats["topics_completed"] += 1
+                    print(f"[{finished}] {topic!r} checkpoint {index + 1}: {checkpoint['topic']} ({elapsed:.1f}s)")
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_s"] = round(elapsed, 1)
+    stats["topics_per_min"] = round(stats["topics_completed"] / elapsed * 60, 2) if elapsed else 0.0
+    stats["checkpoints_per_min"] = round(stats["checkpoints_completed"] / elapsed * 60, 2) if elapsed else 0.0
+    stats["tokens"] = get_scheduler().metrics()["tokens_total"] - tokens_before
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate curricula for a list of topics")
+    parser.add_argument("topics_file", help="Text file with one topic per line")
+    parser.add_argument("--output", default="curricula.jsonl", help="JSONL results file (also the resume log)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Topics/checkpoints processed in parallel")
+    args = parser.parse_args(argv)
+
+    topics = load_topics(args.topics_file)
+    print(f"--- [BATCH] {len(topics)} topics, concurrency {args.concurrency} ---")
+    summary = run_batch(topics, args.output, concurrency=args.concurrency)
+
+    print("--- [BATCH] Summary ---")
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    return 1 if summary["failures"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
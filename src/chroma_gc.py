@@ -0,0 +1,268 @@
+"""Chroma GC - Disk-quota-aware garbage collection and compaction for ./chroma_db
+
+RAGManager opens one collection per checkpoint topic, so the store grows with
+every distinct topic ever studied. Each open stamps a last_access time in the
+collection's metadata; a background job evicts least recently used
+collections beyond the collection cap or disk quota through the public client
+API and VACUUMs the SQLite file so freed pages go back to the filesystem.
+Compaction touches Chroma's file only when it has the layout this module was
+written against (chromadb 1.x, pinned in requirements.txt); otherwise it is
+skipped.
+
+Usage:
+    python -m src.chroma_gc report             # collection count, sizes, reclaimable bytes
+    python -m src.chroma_gc collect [--dry-run] # evict and compact now
+    python -m src.chroma_gc vacuum             # only compact
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from src import resources
+from src.persistence import connect, enabled
+
+CHROMA_MAX_COLLECTIONS = int(os.getenv("CHROMA_MAX_COLLECTIONS", "500"))
+CHROMA_DISK_QUOTA_MB = float(os.getenv("CHROMA_DISK_QUOTA_MB", "1024"))
+CHROMA_GC_INTERVAL = float(os.getenv("CHROMA_GC_INTERVAL", "3600"))
+# Collections used more recently than this are never evicted (they may be mid-gather)
+CHROMA_GC_MIN_IDLE = float(os.getenv("CHROMA_GC_MIN_IDLE", "3600"))
+
+LAST_ACCESS_KEY = "last_access"
+# last_access is rewritten at most this often per collection, so opens stay read-only
+ACCESS_RESOLUTION = 300
+
+# Storage layout compaction relies on: the chromadb major version and tables of its SQLite file
+SUPPORTED_CHROMA_MAJOR = "1"
+EXPECTED_TABLES = {"collections", "segments", "embeddings"}
+
+_maintenance = None
+_maintenance_lock = threading.Lock()
+
+def record_access(collection, now=None):
+    """Stamps the collection's last_access metadata (throttled to ACCESS_RESOLUTION)"""
+    now = time.time() if now is None else now
+    metadata = dict(collection.metadata or {})
+    if now - float(metadata.get(LAST_ACCESS_KEY, 0)) < ACCESS_RESOLUTION:
+        return
+    try:
+        collection.modify(metadata={**metadata, LAST_ACCESS_KEY: now})
+    except Exception as e:
+        print(f"Warning: Could not record access for collection {collection.name}: {e}")
+
+def _dir_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # Removed while walking
+    return total
+
+class ChromaMaintenance:
+    """LRU eviction and VACUUM over the shared persistent Chroma client's directory"""
+
+    def __init__(self, max_collections=None, quota_mb=None, min_idle=None):
+        self.path = resources.CHROMA_PATH
+        self.max_collections = CHROMA_MAX_COLLECTIONS if max_collections is None else max_collections
+        self.quota_bytes = int((CHROMA_DISK_QUOTA_MB if quota_mb is None else quota_mb) * 1024 * 1024)
+        self.min_idle = CHROMA_GC_MIN_IDLE if min_idle is None else min_idle
+        self.stats = {"runs": 0, "evicted": 0, "vacuums": 0, "reclaimed_bytes": 0,
+                      "last_run": None, "last_error": None}
+        self._lock = threading.Lock()  # One collection pass at a time
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def sqlite_path(self):
+        return os.path.join(self.path, "chroma.sqlite3")
+
+    def disk_bytes(self):
+        return _dir_bytes(self.path) if os.path.isdir(self.path) else 0
+
+    def collections(self):
+        """Per-collection name, records, bytes and last_access, least recently used first
+
+        Bytes are the collection's share of the store's disk usage by record
+        count (the client API does not expose per-collection sizes).
+        """
+        client = resources.get_chroma_client()
+        entries = [
+            {"name": collection.name, "records": collection.count(), "bytes": 0,
+             "last_access": float((collection.metadata or {}).get(LAST_ACCESS_KEY) or 0)}
+            for collection in client.list_collections()
+        ]
+        total_records = sum(entry["records"] for entry in entries) or 1
+        disk = self.disk_bytes()
+        for entry in entries:
+            entry["bytes"] = int(disk * entry["records"] / total_records)
+        return sorted(entries, key=lambda entry: entry["last_access"])
+
+    def compactable(self):
+        """True only for a SQLite file with the layout this module was written against (fails closed)"""
+        import chromadb
+
+        if not chromadb.__version__.startswith(SUPPORTED_CHROMA_MAJOR + "."):
+            print(f"Warning: chromadb {chromadb.__version__} is not supported for compaction, skipping VACUUM")
+            return False
+        if not os.path.exists(self.sqlite_path):
+            return False
+        try:
+            with connect(self.sqlite_path) as conn:
+                tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        except sqlite3.DatabaseError as e:
+            print(f"Warning: Cannot read {self.sqlite_path} ({e}), skipping VACUUM")
+            return False
+        if not EXPECTED_TABLES <= tables:
+            print(f"Warning: Unexpected Chroma layout in {self.sqlite_path}, skipping VACUUM")
+            return False
+        return True
+
+    def free_bytes(self):
+        """Bytes of unused pages in the SQLite file that VACUUM would return (0 if it cannot be compacted)"""
+        if not self.compactable():
+            return 0
+        with connect(self.sqlite_path) as conn:
+            return conn.execute("PRAGMA freelist_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+    def plan(self, collections=None, now=None):
+        """Collections to evict, least recently used first, to get under the collection cap and disk quota"""
+        now = time.time() if now is None else now
+        collections = self.collections() if collections is None else collections
+        count = len(collections)
+        used = sum(entry["bytes"] for entry in collections)
+        evict = []
+        for entry in collections:
+            if count <= self.max_collections and used <= self.quota_bytes:
+                break
+            if now - entry["last_access"] < self.min_idle:
+                continue  # In use; the quota may stay exceeded until it goes idle
+            evict.append(entry)
+            count -= 1
+            used -= entry["bytes"]
+        return evict
+
+    def vacuum(self, min_free_bytes=0):
+        """Rebuilds the SQLite file without its free pages when they reach min_free_bytes; True if run"""
+        free = self.free_bytes()
+        if free == 0 or free < min_free_bytes:
+            return False
+        with connect(self.sqlite_path) as conn:
+            conn.execute("VACUUM")
+        return True
+
+    def collect(self, dry_run=False):
+        """One maintenance pass: evict LRU collections, then compact; returns a report"""
+        with self._lock:
+            start = time.perf_counter()
+            before = self.disk_bytes()
+            evict = self.plan()
+            report = {"disk_bytes_before": before, "evicted": [entry["name"] for entry in evict], "dry_run": dry_run}
+            if dry_run:
+                report["reclaimable_bytes"] = sum(entry["bytes"] for entry in evict) + self.free_bytes()
+                return report
+
+            try:
+                client = resources.get_chroma_client()
+                for entry in evict:
+                    client.delete_collection(entry["name"])
+                # Compact when evictions freed pages or at least a tenth of the file is free
+                report["vacuumed"] = self.vacuum(
+                    0 if evict else max(1024 * 1024, os.path.getsize(self.sqlite_path) // 10)
+                ) if os.path.exists(self.sqlite_path) else False
+            except Exception as e:
+                self.stats["last_error"] = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                after = self.disk_bytes()
+                report["disk_bytes_after"] = after
+                report["reclaimed_bytes"] = max(0, before - after)
+                report["seconds"] = round(time.perf_counter() - start, 3)
+                self.stats["runs"] += 1
+                self.stats["evicted"] += len(evict)
+                self.stats["vacuums"] += int(report.get("vacuumed", False))
+                self.stats["reclaimed_bytes"] += report["reclaimed_bytes"]
+                self.stats["last_run"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+        print(f"--- [CHROMA GC] Evicted {len(evict)} collections, "
+              f"reclaimed {report['reclaimed_bytes'] / (1024 * 1024):.1f} MB ---")
+        return report
+
+    def report(self):
+        """Collection count, sizes and what a collection pass would reclaim"""
+        collections = self.collections()
+        return {
+            "path": self.path,
+            "collections": len(collections),
+            "max_collections": self.max_collections,
+            "disk_bytes": self.disk_bytes(),
+            "quota_bytes": self.quota_bytes,
+            "sqlite_bytes": os.path.getsize(self.sqlite_path) if os.path.exists(self.sqlite_path) else 0,
+            "sqlite_free_bytes": self.free_bytes(),
+            "would_evict": [entry["name"] for entry in self.plan(collections)],
+            "largest": sorted(collections, key=lambda entry: -entry["bytes"])[:10],
+        }
+
+    def gc_stats(self):
+        """Counters across maintenance passes in this process"""
+        return dict(self.stats)
+
+    def start(self, interval=CHROMA_GC_INTERVAL):
+        """Runs collect() every interval seconds on a daemon thread (idempotent)"""
+        if self._thread is not None or interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="chroma-gc", daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.collect()
+            except Exception as e:
+                print(f"Warning: Chroma maintenance failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+def get_chroma_maintenance():
+    """Returns the process-wide Chroma maintenance job (None when disabled via CHROMA_GC_ENABLED)"""
+    global _maintenance
+    if not enabled("CHROMA_GC_ENABLED"):
+        return None
+    if _maintenance is None:
+        with _maintenance_lock:
+            if _maintenance is None:
+                _maintenance = ChromaMaintenance()
+    return _maintenance
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report on and compact the persistent Chroma store")
+    parser.add_argument("--path", help=f"Chroma directory (default: {resources.CHROMA_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("report", help="Show collection counts, sizes and reclaimable bytes")
+    collect = commands.add_parser("collect", help="Evict LRU collections over the cap or quota, then compact")
+    collect.add_argument("--dry-run", action="store_true", help="Only report what would be evicted")
+    commands.add_parser("vacuum", help="VACUUM the SQLite file")
+    args = parser.parse_args(argv)
+
+    if args.path:
+        resources.CHROMA_PATH = args.path
+    maintenance = ChromaMaintenance()
+    if not os.path.exists(maintenance.sqlite_path):
+        print(f"No Chroma store at {maintenance.path}")
+        return 1
+    if args.command == "report":
+        print(json.dumps(maintenance.report(), indent=2))
+    elif args.command == "collect":
+        print(json.dumps(maintenance.collect(dry_run=args.dry_run), indent=2))
+    elif args.command == "vacuum":
+        before = maintenance.disk_bytes()
+        maintenance.vacuum()
+        print(f"Reclaimed {max(0, before - maintenance.disk_bytes())} bytes")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Coverage Scorer - Local embedding-based check of how well context covers the objectives"""
+import os
+import re
+import numpy as np
+from src.resources import get_embedding_function
+
+# Cosine similarity at which an objective counts as covered by some chunk
+COVERAGE_THRESHOLD = float(os.getenv("COVERAGE_THRESHOLD", "0.45"))
+# Local scores in this band are escalated to the LLM judge
+AMBIGUOUS_SCORES = (3,)
+
+def split_objectives(objectives):
+    """Splits the comma-separated objectives string into individual objectives"""
+    return [obj.strip() for obj in objectives.split(",") if obj.strip()]
+
+def split_context(context, min_chars=25):
+    """Splits study material into sentence-level chunks, dropping headings and fragments"""
+    chunks = []
+    for line in context.split("\n"):
+        line = line.strip().lstrip("#*-•> ").strip()
+        for sentence in re.split(r"(?<=[.!?])\s+", line):
+            if len(sentence) >= min_chars:
+                chunks.append(sentence)
+    return chunks
+
+def normalize_rows(vectors):
+    """Stacks embeddings (or a single vector) into a float32 matrix with unit-length rows"""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+def objective_coverage(objectives, context, embedding_fn=None):
+    """Returns {objective: best cosine similarity against any context chunk}"""
+    objective_list = split_objectives(objectives)
+    chunks = split_context(context)
+    if not objective_list:
+        return {}
+    if not chunks:
+        return {obj: 0.0 for obj in objective_list}
+
+    embedding_fn = embedding_fn or get_embedding_function()
+    # One embedding pass for objectives and chunks together
+    vectors = normalize_rows(embedding_fn(objective_list + chunks))
+    objective_vectors, chunk_vectors = vectors[:len(objective_list)], vectors[len(objective_list):]
+    best = (objective_vectors @ chunk_vectors.T).max(axis=1)
+    return {obj: float(sim) for obj, sim in zip(objective_list, best)}
+
+def coverage_to_score(coverage, threshold=COVERAGE_THRESHOLD):
+    """Maps the fraction of covered objectives onto the validator's 1-5 scale"""
+    if not coverage:
+        return 1
+    covered = sum(sim >= threshold for sim in coverage.values()) / len(coverage)
+    if covered >= 0.8:
+        return 5
+    if covered >= 0.6:
+        return 4
+    if covered >= 0.4:
+        return 3
+    if covered >= 0.2:
+        return 2
+    return 1
+
+def local_relevance_score(objectives, context, embedding_fn=None):
+    """Returns (score 1-5, is_ambiguous, per-objective coverage)"""
+    coverage = objective_coverage(objectives, context, embedding_fn)
+    score = coverage_to_score(coverage)
+    return score, score in AMBIGUOUS_SCORES, coverage
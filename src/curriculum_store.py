@@ -0,0 +1,223 @@
+"""Curriculum Store - Persistent SQLite store of generated learning paths, study material and question banks
+
+Artifacts are versioned by model and prompt: an entry written by another
+model or an older prompt is ignored (and replaced on the next write), so
+changing either invalidates the store without manual cleanup.
+
+Usage:
+    python -m src.curriculum_store stats
+    python -m src.curriculum_store invalidate [--topic TOPIC] [--kind path|material|questions]
+    python -m src.curriculum_store prune                 # drop outdated and expired entries
+    python -m src.curriculum_store warm topics.txt       # pre-generate popular topics
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from src.persistence import connect, enabled
+from src.utils import model_name
+
+CURRICULUM_STORE_PATH = os.getenv("CURRICULUM_STORE_PATH", "./cache/curriculum.db")
+
+# Bump an artifact's prompt version whenever the prompt that produces it changes
+PROMPT_VERSIONS = {
+    "path": "1",       # src/curriculum.py
+    "material": "1",   # src/nodes/gatherer.py + validator
+    "questions": "2",  # src/nodes/question_generator.py (question bank format)
+}
+
+def normalize_topic(text):
+    """Case-, whitespace- and punctuation-insensitive form of a topic or objective list"""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s,+#-]", " ", (text or "").lower())).strip()
+
+# Node whose model profile generates each artifact kind
+ARTIFACT_NODES = {"path": "path", "material": "gather_context", "questions": "question_bank"}
+
+def artifact_version(kind):
+    """Version tag for an artifact kind: hash of the generating model and its prompt version"""
+    return hashlib.sha256(
+        f"{model_name(ARTIFACT_NODES[kind])}:{kind}:{PROMPT_VERSIONS[kind]}".encode("utf-8")
+    ).hexdigest()[:16]
+
+def material_key(topic, objectives):
+    """Store key for a checkpoint's study material"""
+    return f"{normalize_topic(topic)}|{normalize_topic(objectives)}"
+
+def questions_key(gathered_context):
+    """Store key for the quiz written from a specific study guide"""
+    return hashlib.sha256((gathered_context or "").encode("utf-8")).hexdigest()[:32]
+
+class CurriculumStore:
+    """Versioned key-value store of generated artifacts, grouped by kind and topic"""
+
+    def __init__(self, path=CURRICULUM_STORE_PATH, ttl=None):
+        self.path = path
+        self.ttl = float(os.getenv("CURRICULUM_STORE_TTL", "2592000")) if ttl is None else ttl
+        self.stats = {"hits": 0, "misses": 0, "outdated": 0, "stores": 0}
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with connect(self.path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    topic TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (kind, key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_topic ON artifacts(topic)")
+
+    def _expired(self, stored_at, now):
+        return self.ttl > 0 and now - stored_at > self.ttl
+
+    def get(self, kind, key):
+        """Returns the stored artifact, or None if missing, expired or from another model/prompt version"""
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT content, version, stored_at FROM artifacts WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row is None or self._expired(row[2], now):
+                self.stats["misses"] += 1
+                return None
+            if row[1] != artifact_version(kind):
+                self.stats["outdated"] += 1
+                return None
+            conn.execute(
+                "UPDATE artifacts SET last_access = ?, hits = hits + 1 WHERE kind = ? AND key = ?", (now, kind, key)
+            )
+            self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, kind, key, topic, value):
+        """Stores a JSON-serialisable artifact under the current version"""
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (kind, key, normalize_topic(topic), artifact_version(kind), json.dumps(value), now, now)
+            )
+            self.stats["stores"] += 1
+
+    def invalidate(self, topic=None, kind=None):
+        """Deletes artifacts for a topic (including its checkpoints' material and quizzes) and/or kind
+
+        With neither argument the whole store is cleared. Returns the number
+        of deleted entries.
+        """
+        topics = None
+        if topic is not None:
+            topics = {normalize_topic(topic)}
+            with connect(self.path) as conn:
+                row = conn.execute(
+                    "SELECT content FROM artifacts WHERE kind = 'path' AND key = ?", (normalize_topic(topic),)
+                ).fetchone()
+            checkpoints = json.loads(row[0]) if row else []
+            topics.update(normalize_topic(checkpoint.get("topic")) for checkpoint in checkpoints)
+
+        clauses, params = [], []
+        if topics:
+            clauses.append(f"topic IN ({','.join('?' * len(topics))})")
+            params.extend(topics)
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock, connect(self.path) as conn:
+            return conn.execute(f"DELETE FROM artifacts{where}", params).rowcount
+
+    def prune(self):
+        """Deletes entries from other model/prompt versions and expired entries; returns the count"""
+        deleted = 0
+        with self._lock, connect(self.path) as conn:
+            for kind in PROMPT_VERSIONS:
+                deleted += conn.execute(
+                    "DELETE FROM artifacts WHERE kind = ? AND version != ?", (kind, artifact_version(kind))
+                ).rowcount
+            if self.ttl > 0:
+                deleted += conn.execute(
+                    "DELETE FROM artifacts WHERE stored_at < ?", (time.time() - self.ttl,)
+                ).rowcount
+        return deleted
+
+    def store_stats(self):
+        """Returns lookup counters, hit rate and entry counts per kind"""
+        with self._lock:
+            stats = dict(self.stats)
+            with connect(self.path) as conn:
+                stats["entries"] = dict(conn.execute("SELECT kind, COUNT(*) FROM artifacts GROUP BY kind").fetchall())
+                stats["popular_topics"] = [
+                    row[0] for row in conn.execute(
+                        "SELECT topic FROM artifacts WHERE kind = 'path' ORDER BY hits DESC LIMIT 10"
+                    ).fetchall()
+                ]
+        lookups = stats["hits"] + stats["misses"] + stats["outdated"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_curriculum_store():
+    """Returns the process-wide curriculum store (None when disabled via CURRICULUM_STORE_ENABLED)"""
+    global _store
+    if not enabled("CURRICULUM_STORE_ENABLED"):
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CurriculumStore()
+    return _store
+
+def warm_up(topics, concurrency=4):
+    """Generates and stores curricula for topics not already in the store; returns the batch summary"""
+    import tempfile
+    from src.batch import run_batch
+
+    # The graph and curriculum generator read through the store, so stored topics cost nothing
+    with tempfile.TemporaryDirectory() as workdir:
+        return run_batch(topics, os.path.join(workdir, "warmup.jsonl"), concurrency=concurrency)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and maintain the curriculum store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show entry counts and popular topics")
+    invalidate = commands.add_parser("invalidate", help="Delete stored artifacts")
+    invalidate.add_argument("--topic", help="Only this topic (and its checkpoints)")
+    invalidate.add_argument("--kind", choices=sorted(PROMPT_VERSIONS), help="Only this artifact kind")
+    commands.add_parser("prune", help="Delete outdated and expired entries")
+    warm = commands.add_parser("warm", help="Pre-generate curricula for topics in a file")
+    warm.add_argument("topics_file", help="Text file with one topic per line")
+    warm.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    store = get_curriculum_store()
+    if store is None:
+        print("Curriculum store is disabled (CURRICULUM_STORE_ENABLED)")
+        return 1
+    if args.command == "stats":
+        print(json.dumps(store.store_stats(), indent=2))
+    elif args.command == "invalidate":
+        print(f"Deleted {store.invalidate(topic=args.topic, kind=args.kind)} entries")
+    elif args.command == "prune":
+        print(f"Deleted {store.prune()} entries")
+    elif args.command == "warm":
+        from src.batch import load_topics
+        summary = warm_up(load_topics(args.topics_file), concurrency=args.concurrency)
+        print(json.dumps(summary, indent=2))
+        return 1 if summary["failures"] else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,63 @@
 """LangGraph Workflow - Defines the autonomous learning agent graph"""
-from langgraph.graph import StateGraph, END
+import os
+import threading
 from src.state import LearningState
-from src.nodes.gatherer import gather_context_node
-from src.nodes.validator import validate_context_node
-from src.nodes.question_generator import generate_questions_node
-from src.nodes.verifier import verify_understanding_node
-from src.nodes.feynman import feynman_teaching_node
-
-def create_graph():
-    """Creates and compiles the learning workflow graph"""
+from src.telemetry import traced_anode, traced_node
+
+GRAPH_CHECKPOINT_PATH = os.getenv("GRAPH_CHECKPOINT_PATH", "./cache/graph_checkpoints.db")
+
+_shared_graph = None
+_shared_graph_lock = threading.Lock()
+
+def route_entry(state: LearningState):
+    """Resume at the first node that still has work to do for this state"""
+    if not state.get("gathered_context"):
+        return "gather_context"
+    if state.get("learner_answers"):
+        return "verify_understanding"  # Grade against the validated context
+    return "generate_questions"  # Retake after Feynman teaching
+
+def create_graph(checkpointer=None, teach=False):
+    """Creates and compiles the learning workflow graph (persisting state per thread if given a checkpointer)
+
+    With teach=True a failing submission continues to Feynman teaching and a
+    fresh quiz inside the graph, for headless callers. The app streams Feynman
+    teaching on demand instead, so by default the graph ends after grading.
+    """
+    # LangGraph and the nodes' dependencies (Chroma, search, LLM client) load on first compile, not on import
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph, END
+    from src.nodes.gatherer import agather_context_node, gather_context_node
+    from src.nodes.validator import avalidate_context_node, validate_context_node
+    from src.nodes.question_generator import agenerate_questions_node, generate_questions_node
+    from src.nodes.verifier import averify_understanding_node, verify_understanding_node
+    from src.nodes.feynman import afeynman_teaching_node, feynman_teaching_node
+
     workflow = StateGraph(LearningState)
 
-    # Add all workflow nodes
-    workflow.add_node("gather_context", gather_context_node)
-    workflow.add_node("validate_context", validate_context_node)
-    workflow.add_node("generate_questions", generate_questions_node)
-    workflow.add_node("verify_understanding", verify_understanding_node)
-    workflow.add_node("feynman_teaching", feynman_teaching_node)
+    # Add all workflow nodes (each traced with a span and latency histogram);
+    # invoke/stream run the sync variants, ainvoke/astream the async ones
+    nodes = {
+        "gather_context": (gather_context_node, agather_context_node),
+        "validate_context": (validate_context_node, avalidate_context_node),
+        "generate_questions": (generate_questions_node, agenerate_questions_node),
+        "verify_understanding": (verify_understanding_node, averify_understanding_node),
+        "feynman_teaching": (feynman_teaching_node, afeynman_teaching_node),
+    }
+    for name, (node_fn, anode_fn) in nodes.items():
+        workflow.add_node(name, RunnableLambda(traced_node(name, node_fn), afunc=traced_anode(name, anode_fn), name=name))
+
+    # Enter at the right node so submissions and retakes reuse gathered context
+    workflow.set_conditional_entry_point(route_entry)
+
+    def after_gather(state: LearningState):
+        """Stored material was validated when it was first generated"""
+        return "generate_questions" if state.get("material_cached") else "validate_context"
 
-    # Set entry point and basic flow
-    workflow.set_entry_point("gather_context")
-    workflow.add_edge("gather_context", "validate_context")
+    workflow.add_conditional_edges("gather_context", after_gather)
 
     def decide_path(state: LearningState):
-        """Route based on validation and learner answers"""
-        if state.get("learner_answers"):
-            return "verify_understanding"
+        """Route based on validation result"""
         if state["relevance_score"] >= 4 or state.get("search_retry_count", 0) >= 3:
             return "generate_questions"
         return "gather_context"  # Retry gathering
@@ -33,16 +65,52 @@ def create_graph():
     workflow.add_conditional_edges("validate_context", decide_path)
 
     def check_mastery(state: LearningState):
-        """Route to Feynman teaching if score below 70%, else end"""
+        """Route to Feynman teaching if score below 70% (when teaching in the graph), else end"""
         if state["understanding_score"] < 70 and state.get("learner_answers"):
             print(f"--- [UNDER-THRESHOLD] Score: {state['understanding_score']}% ---")
-            return "feynman_teaching"
+            if teach:
+                return "feynman_teaching"
         return END
 
     workflow.add_conditional_edges("verify_understanding", check_mastery)
     
-    # Feynman teaching loops back to generate new questions
+    # Feynman teaching loops back to generate new questions (also the next step after the app's
+    # update_state(as_node="feynman_teaching"))
     workflow.add_edge("feynman_teaching", "generate_questions")
     workflow.add_edge("generate_questions", END)
 
-    return workflow.compile()
\ No newline at end of file
+    return workflow.compile(checkpointer=checkpointer)
+
+def create_checkpointer(path=GRAPH_CHECKPOINT_PATH):
+    """SQLite checkpointer shared by all sessions in the process
+
+    The saver lives on the shared async runtime loop, so async graph runs use
+    it directly and sync calls (get_state, update_state, invoke) from other
+    threads are forwarded to that loop.
+    """
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    from src.aio import run_async
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    async def open_saver():
+        saver = AsyncSqliteSaver(await aiosqlite.connect(path))
+        await saver.setup()
+        return saver
+
+    return run_async(open_saver()).result()
+
+def get_shared_graph():
+    """Returns the process-wide compiled graph with SQLite state checkpointing"""
+    global _shared_graph
+    if _shared_graph is None:
+        with _shared_graph_lock:
+            if _shared_graph is None:
+                _shared_graph = create_graph(create_checkpointer())
+    return _shared_graph
+
+def thread_config(session_id, path_id, checkpoint_idx):
+    """Run config selecting the persisted state of one checkpoint in one learner's path"""
+    return {"configurable": {"thread_id": f"{session_id}:{path_id}:{checkpoint_idx}"}}
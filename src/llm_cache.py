@@ -0,0 +1,125 @@
+"""LLM Response Cache - In-memory LRU plus persistent SQLite tier for deterministic LLM calls"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from src.persistence import connect, enabled
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./cache/llm_cache.db")
+
+def make_cache_key(model, params, prompt):
+    """Hashes model name, generation parameters and prompt into a cache key"""
+    payload = json.dumps(
+        {"model": model, "params": params, "prompt": prompt},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMCache:
+    """Two-tier (memory LRU -> SQLite) cache of LLM completions with TTL and size eviction"""
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl=None, memory_entries=None, max_entries=None):
+        self.path = path
+        self.ttl = float(os.getenv("LLM_CACHE_TTL", "604800")) if ttl is None else ttl
+        self.memory_entries = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256")) if memory_entries is None else memory_entries
+        self.max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000")) if max_entries is None else max_entries
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._memory = OrderedDict()  # key -> (content, stored_at)
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with connect(self.path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_last_access ON llm_responses(last_access)")
+
+    def _remember(self, key, content, stored_at):
+        """Adds an entry to the memory tier (caller holds the lock)"""
+        self._memory[key] = (content, stored_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Returns cached content for key, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+            with connect(self.path) as conn:
+                row = conn.execute(
+                    "SELECT content, stored_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] > self.ttl:
+                    conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    row = None
+                if row is None:
+                    self.stats["misses"] += 1
+                    return None
+                conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+
+            self._remember(key, row[0], row[1])
+            self.stats["disk_hits"] += 1
+            return row[0]
+
+    def put(self, key, content):
+        """Stores content in both tiers, evicting least recently used disk entries over max_entries"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, content, now)
+            with connect(self.path) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?)",
+                    (key, content, now, now)
+                )
+                count = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+                overflow = count - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        "DELETE FROM llm_responses WHERE key IN "
+                        "(SELECT key FROM llm_responses ORDER BY last_access ASC LIMIT ?)",
+                        (overflow,)
+                    )
+                    self.stats["evictions"] += overflow
+            self.stats["stores"] += 1
+
+    def cache_stats(self):
+        """Returns hit/miss counters, hit rate and tier sizes"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            with connect(self.path) as conn:
+                stats["disk_entries"] = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        return stats
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache():
+    """Returns the process-wide LLM response cache (None when disabled via LLM_CACHE_ENABLED)"""
+    global _cache
+    if not enabled("LLM_CACHE_ENABLED"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
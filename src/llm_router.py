@@ -0,0 +1,46 @@
+"""LLM Router - Provider selection and per-node model profiles (model, max_tokens, timeout)"""
+import json
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")  # groq | local
+LLM_LOCAL_FALLBACK = os.getenv("LLM_LOCAL_FALLBACK", "true").lower() == "true"
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "llama-3.1-8b-instant")
+
+def _profile(model, max_tokens, timeout):
+    return {"model": model, "max_tokens": max_tokens, "timeout": timeout}
+
+# Classification-style calls (a 1-5 score, a percentage) use the fast model with tight
+# caps; generation gets room for a full study guide or question set but no more
+NODE_PROFILES = {
+    "default": _profile(LLM_MODEL, 1024, 60),
+    "path": _profile(LLM_MODEL, 600, 60),
+    "gather_context": _profile(LLM_MODEL, 1200, 60),
+    "validate_context": _profile(LLM_FAST_MODEL, 300, 20),
+    "generate_questions": _profile(LLM_MODEL, 900, 45),
+    "question_bank": _profile(LLM_MODEL, 2400, 90),
+    "verify_understanding": _profile(LLM_FAST_MODEL, 400, 20),
+    "feynman_teaching": _profile(LLM_MODEL, 1024, 60),
+}
+
+# e.g. LLM_PROFILES='{"feynman_teaching": {"model": "llama-3.3-70b-versatile", "max_tokens": 1500}}'
+for _node, _overrides in json.loads(os.getenv("LLM_PROFILES") or "{}").items():
+    NODE_PROFILES[_node] = {**NODE_PROFILES.get(_node, NODE_PROFILES["default"]), **_overrides}
+
+def get_profile(node=None):
+    """Model, max_tokens and timeout for a node's LLM calls"""
+    return NODE_PROFILES.get(node) or NODE_PROFILES["default"]
+
+def is_unreachable(error):
+    """True for failures that mean the provider cannot serve requests: connection errors, timeouts, 5xx"""
+    from src.scheduler import _status_code
+
+    code = _status_code(error)
+    if code is not None:
+        return code >= 500
+    names = {cls.__name__ for cls in type(error).__mro__}
+    return bool(names & {"APIConnectionError", "APITimeoutError", "TransportError", "TimeoutException",
+                         "ConnectionError", "TimeoutError"})
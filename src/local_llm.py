@@ -0,0 +1,195 @@
+"""Local LLM - Deterministic, network-free stand-in for the Groq chat model
+
+Answers the app's own prompt templates extractively from the text in the
+prompt: learning paths from the topic, study guides and quizzes from the
+gathered material, relevance scores from word overlap. Meant for tests,
+benchmarks and degraded operation while the provider is unreachable.
+"""
+import hashlib
+import re
+import threading
+
+LOCAL_MODEL = "local-extractive"
+
+_STOPWORDS = {
+    "about", "after", "also", "because", "before", "being", "between", "could", "every", "first",
+    "their", "there", "these", "those", "through", "under", "using", "where", "which", "while",
+    "would", "should", "other", "than", "then", "them", "they", "this", "that", "with", "from",
+}
+_FALLBACK_DISTRACTORS = ["structure", "process", "function", "pattern", "method", "system"]
+
+_client = None
+_client_lock = threading.Lock()
+
+def _section(prompt, start, end=None):
+    """Text after the start label, up to the end label (or the end of the prompt)"""
+    match = re.search(re.escape(start) + r"\s*(.*?)" + (re.escape(end) if end else r"\Z"), prompt, re.DOTALL)
+    return match.group(1).strip() if match else ""
+
+def _words(text):
+    return [w for w in re.findall(r"[a-z][a-z\-]{3,}", text.lower()) if w not in _STOPWORDS]
+
+def _sentences(text):
+    """Prose sentences from text, skipping headings, list markers, bold labels and fragments"""
+    sentences = []
+    for line in text.split("\n"):
+        line = line.strip().lstrip("-*• ").strip()
+        if not line or line.startswith("#"):
+            continue
+        # Drop a leading bold label such as "Term**:" (its opening ** went with the list marker)
+        line = re.sub(r"^[^*.!?]{1,60}\*\*[:.]\s*", "", line).replace("**", "")
+        sentences.extend(s.strip() for s in re.split(r"(?<=[.!?])\s+", line) if len(s.strip()) >= 30)
+    return list(dict.fromkeys(sentences))
+
+def _objectives(text):
+    return [o.strip(" []") for o in text.split(",") if o.strip(" []")]
+
+def _overlap(sentence, objective):
+    """Share of the objective's words that appear in the sentence"""
+    wanted = set(_words(objective))
+    return len(wanted & set(_words(sentence))) / len(wanted) if wanted else 0.0
+
+def _best_sentences(sentences, objective, count):
+    """The count sentences sharing most words with the objective (at least one sentence if any exist)"""
+    ranked = sorted(sentences, key=lambda s: -_overlap(s, objective))
+    return [s for s in ranked[:count] if _overlap(s, objective) > 0] or ranked[:1]
+
+def _stable_index(text, modulo):
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16) % modulo
+
+def _learning_path(prompt):
+    topic = _section(prompt, 'for the topic: "', '"') or "the topic"
+    stages = [
+        ("Fundamentals", f"What {topic} is, Key terminology, Core principles, Basic building blocks, Why it matters"),
+        ("Core Concepts", "Main components, How the parts interact, Key mechanisms, Common patterns, Worked examples"),
+        ("Techniques", "Standard methods, Step-by-step procedures, Choosing an approach, Common pitfalls, Evaluation"),
+        ("Applications", "Real-world use cases, Practical implementation, Tooling, Case studies, Problem solving"),
+        ("Mastery", "Advanced variations, Trade-offs, Optimisation, Troubleshooting, Connecting to related fields"),
+    ]
+    return "\n\n".join(
+        f"CHECKPOINT_{i}: {name}\nOBJECTIVES_{i}: {objectives}" for i, (name, objectives) in enumerate(stages, 1)
+    )
+
+def _study_guide(prompt):
+    topic = _section(prompt, "for the topic:", "\n")
+    objectives = _objectives(_section(prompt, "Learning Objectives:", "\n"))
+    sentences = _sentences(_section(prompt, "Raw Content:", "Format the content as:"))
+    key_points = [_best_sentences(sentences, objective, 2) for objective in objectives]
+
+    lines = [f"## {topic} - Study Guide", "", "### Key Concepts"]
+    lines += [f"- **{objective}**: {points[0]}" for objective, points in zip(objectives, key_points) if points]
+    lines += ["", "### Detailed Explanation"]
+    for objective, points in zip(objectives, key_points):
+        lines.append(f"**{objective}.** " + (" ".join(points) if points else "No source material was found."))
+    lines += ["", "### Important Points"]
+    lines += [f"- {sentence}" for sentence in sentences[:3]]
+    return "\n".join(lines)
+
+def _relevance(prompt):
+    objectives = _objectives(_section(prompt, "Objectives:", "\n"))
+    sentences = _sentences(_section(prompt, "Context:", "TASK:"))
+    covered = sum(1 for o in objectives if any(_overlap(s, o) >= 0.5 for s in sentences))
+    score = 1 + round(4 * covered / len(objectives)) if objectives else 1
+    return f"{covered} of {len(objectives)} objectives are covered by the context.\nFINAL_SCORE: {score}"
+
+def _quiz(prompt):
+    """Fill-in-the-blank MCQs: each blanks the longest content word of a context sentence"""
+    count = int(_section(prompt, "Create EXACTLY", "Multiple") or 5)
+    sentences = _sentences(_section(prompt, "Context:", "Create EXACTLY"))
+    avoid = _section(prompt, "Do NOT repeat or rephrase any of these existing questions:", "STRICT RULES:")
+    vocabulary = sorted(set(w for s in sentences for w in _words(s) if len(w) >= 5)) or _FALLBACK_DISTRACTORS
+
+    questions = []
+    for rank in range(3):  # Blank the longest, then the second and third longest word
+        for sentence in sentences:
+            candidates = sorted(set(w for w in _words(sentence) if len(w) >= 5), key=lambda w: (-len(w), w))
+            if len(candidates) <= rank:
+                continue
+            answer = candidates[rank]
+            stem = re.sub(rf"\b{re.escape(answer)}\b", "_____", sentence, count=1, flags=re.IGNORECASE)
+            if stem in avoid or stem == sentence:
+                continue
+            pool = [w for w in vocabulary + _FALLBACK_DISTRACTORS if w != answer]
+            start = _stable_index(stem, len(pool))
+            options = list(dict.fromkeys(pool[start:] + pool[:start]))[:3]
+            options.insert(_stable_index(answer + stem, 4), answer)
+            questions.append((f"Which word completes the statement? {stem}", options, "ABCD"[options.index(answer)]))
+            if len(questions) == count:
+                break
+        if len(questions) == count:
+            break
+
+    return "\n\n".join(
+        f"{i}. {question}\n" + "".join(f"   {letter}) {option}\n" for letter, option in zip("ABCD", options))
+        + f"   ANSWER: {answer}"
+        for i, (question, options, answer) in enumerate(questions, 1)
+    )
+
+def _feynman(prompt):
+    topic = _section(prompt, "TOPIC:", "\n")
+    sentences = _sentences(_section(prompt, "CONTEXT:", "TOPIC:"))
+    missed = re.findall(r"^\s*\d+\.\s*(.+)$", _section(prompt, "INCORRECT ANSWERS:", "TOPIC:"), re.MULTILINE)
+    simple = " ".join(sentences[:2]) or f"{topic} is easiest to learn one small idea at a time."
+    lines = [
+        f"## 🧠 Feynman Learning: {topic}", "",
+        "### 🎯 Step 1: Simple Explanation", simple, "",
+        "### 🔍 Step 2: Identify Knowledge Gaps",
+    ]
+    lines += [f"- Gap {i}: {question}" for i, question in enumerate(missed[:3], 1)] or ["- Gap 1: Review the key terms"]
+    lines += [
+        "", "### 🎨 Step 3: Use Analogies & Examples",
+        f"- **Example:** {sentences[2] if len(sentences) > 2 else simple}", "",
+        "### 🔄 Step 4: Simplify & Review",
+    ]
+    lines += [f"{i}. {sentence}" for i, sentence in enumerate(sentences[:3], 1)]
+    lines += ["", "### 📝 Step 5: Test Understanding", f"Explain {topic} in your own words in two sentences."]
+    return "\n".join(lines)
+
+# (prompt keyword, responder) pairs checked in order; first match wins
+_RESPONDERS = [
+    ("learning path designer", _learning_path),
+    ("Multiple Choice Questions", _quiz),
+    ("Feynman Technique", _feynman),
+    ("FINAL_PERCENTAGE", lambda prompt: "Answers cannot be graded offline without an answer key.\nFINAL_PERCENTAGE: 0"),
+    ("FINAL_SCORE", _relevance),
+    ("study material", _study_guide),
+]
+
+class LocalChatModel:
+    """Chat-model interface (invoke/stream and async variants) over the extractive responders"""
+
+    model_name = LOCAL_MODEL
+    temperature = 0
+    max_tokens = None
+
+    def _respond(self, prompt):
+        text = str(prompt)
+        for keyword, responder in _RESPONDERS:
+            if keyword in text:
+                return responder(text)
+        return ""
+
+    def invoke(self, prompt, **kwargs):
+        from langchain_core.messages import AIMessage
+        return AIMessage(content=self._respond(prompt), response_metadata={"model_name": LOCAL_MODEL})
+
+    def stream(self, prompt, **kwargs):
+        from langchain_core.messages import AIMessageChunk
+        for piece in re.findall(r"\S+\s*|\s+", self._respond(prompt)):
+            yield AIMessageChunk(content=piece)
+
+    async def ainvoke(self, prompt, **kwargs):
+        return self.invoke(prompt)
+
+    async def astream(self, prompt, **kwargs):
+        for chunk in self.stream(prompt):
+            yield chunk
+
+def get_local_llm():
+    """Returns the process-wide local model"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = LocalChatModel()
+    return _client
@@ -1,19 +1,27 @@
 """Feynman Teaching Node - Provides simplified explanations for struggling learners"""
+import asyncio
 from src.state import LearningState
-from src.utils import get_llm
+from src.utils import astream_llm, get_llm, stream_llm
+from src.prompting import fit_context, quiz_text
 
-def feynman_teaching_node(state: LearningState):
-    """Generates Feynman-style simplified explanations based on learner's mistakes"""
-    print(f"--- [FEYNMAN ADAPTIVE TEACHING] ---")
-    
-    llm = get_llm()
+def _build_prompt(state: LearningState):
+    # Use the verifier's per-question grading when available instead of re-deriving mistakes
+    results = state.get('question_results') or []
+    if results:
+        missed = [r for r in results if not r['is_correct']]
+        mistakes = "\n\n".join(
+            f"{r['question']}\nLearner chose: {r['selected'] or 'no answer'} | Correct: {r['correct']}"
+            for r in missed
+        ) or "None - all answers were correct."
+        assessment = f"INCORRECT ANSWERS:\n    {mistakes}"
+    else:
+        assessment = f"QUESTIONS: {quiz_text(state)}\n    LEARNER ANSWERS: {state['learner_answers']}"
     
-    prompt = f"""
+    return f"""
     The learner scored {state['understanding_score']}% (Target: 70%).
     
-    CONTEXT: {state['gathered_context']}
-    QUESTIONS: {state['questions']}
-    LEARNER ANSWERS: {state['learner_answers']}
+    CONTEXT: {fit_context("feynman_teaching", state['gathered_context'], state['objectives'])}
+    {assessment}
     TOPIC: {state['topic']}
     OBJECTIVES: {state['objectives']}
     
@@ -45,11 +53,26 @@ def feynman_teaching_node(state: LearningState):
     
     Focus on the learning objectives: {state['objectives']}
     """
-    
-    response = llm.invoke(prompt).content
-    
+
+def _result(state: LearningState, response):
     return {
         "questions": [f"FEYNMAN_PHASE|{response}"], 
         "learner_answers": "", 
         "understanding_score": state['understanding_score']
-    }
\ No newline at end of file
+    }
+
+def feynman_teaching_node(state: LearningState):
+    """Generates Feynman-style simplified explanations based on learner's mistakes"""
+    print(f"--- [FEYNMAN ADAPTIVE TEACHING] ---")
+    
+    llm = get_llm(cache=False, node="feynman_teaching")  # Explanations should adapt to each attempt
+    response = stream_llm(llm, _build_prompt(state), node="feynman_teaching")
+    return _result(state, response)
+
+async def afeynman_teaching_node(state: LearningState):
+    """Async feynman_teaching_node(): the explanation streams via astream"""
+    print(f"--- [FEYNMAN ADAPTIVE TEACHING] ---")
+
+    prompt = await asyncio.to_thread(_build_prompt, state)
+    response = await astream_llm(get_llm(cache=False, node="feynman_teaching"), prompt, node="feynman_teaching")
+    return _result(state, response)
@@ -1,41 +1,91 @@
 """Context Gathering Node - Collects and formats learning materials"""
-from ddgs import DDGS
+import asyncio
+import os
 from src.state import LearningState
 from src.rag import RAGManager
-from src.utils import get_llm
+from src.coverage import split_objectives
+from src.curriculum_store import get_curriculum_store, material_key
+from src.prompting import NODE_BUDGETS, fit_context
+from src.search import aweb_search, web_search
+from src.singleflight import acoalesce, coalesce, flight_key
+from src.utils import astream_llm, get_llm, stream_llm, track_fallback
 
-def gather_context_node(state: LearningState):
-    """Gathers learning materials via web search and formats them using RAG + LLM"""
-    print(f"--- [GATHERING] {state['topic']} ---")
-    
-    # Step 1: Web search for learning materials
-    query = f"{state['topic']} machine learning deep learning tutorial explanation"
-    raw_results = []
-    
-    try:
-        with DDGS() as ddgs:
-            results = [r for r in ddgs.text(query, max_results=8)]
-            raw_results = [r['body'] for r in results]
-    except Exception as e:
-        print(f"Search error: {e}")
-        return {"gathered_context": "Error gathering context."}
+# Only retrieve snippets that appeared in a search within this window
+RAG_MAX_AGE_SECONDS = float(os.getenv("RAG_MAX_AGE_DAYS", "30")) * 86400
+
+# Placeholder context returned when the web search fails
+GATHER_ERROR = "Error gathering context."
+
+def gather_failed(context):
+    """True when no study material was gathered (missing context or the error placeholder)"""
+    return not (context or "").strip() or context.startswith(GATHER_ERROR)
+
+def _stored_material(state: LearningState):
+    """Validated material from an earlier learner, which skips search, RAG, LLM and validation"""
+    store = get_curriculum_store()
+    if not store or state.get("search_retry_count"):
+        return None
+    stored = store.get("material", material_key(state['topic'], state['objectives']))
+    if not stored:
+        return None
+    print(f"--- [STORE HIT] Study material for {state['topic']} ---")
+    return {
+        "gathered_context": stored["content"],
+        "relevance_score": stored["relevance_score"],
+        "material_cached": True
+    }
+
+def _search_query(state: LearningState):
+    """The topic query; retries after a failed validation search for the objectives instead"""
+    if state.get("search_retry_count"):
+        return f"{state['topic']} {state['objectives']} tutorial explanation"
+    return f"{state['topic']} machine learning deep learning tutorial explanation"
+
+def _retrying(state: LearningState):
+    """A re-gather after failed validation must not reuse cached search results or formatting"""
+    return bool(state.get("search_retry_count"))
 
-    # Step 2: Process with RAG for semantic retrieval
-    rag = RAGManager(collection_name=state['topic'])
-    rag.clear_collection()  # Clear old data for fresh content
-    rag.add_documents(raw_results)
+def _retrieve(rag, state: LearningState, results):
+    """Stores search results in the topic corpus and returns budgeted, objective-focused context"""
+    raw_results = [r['body'] for r in results]
+    metadatas = [{"source": r.get('href', '')} for r in results]
+
+    # Process with RAG for semantic retrieval (topic corpus persists and grows)
+    added = rag.add_documents(raw_results, metadatas=metadatas)
+    print(f"Embedded {added} new chunks from {len(raw_results)} search results")
     
-    # Retrieve most relevant content based on learning objectives
-    refined_context = rag.retrieve(query=state['objectives'], n_results=3)
+    # Retrieve recent content for every objective, diversified by MMR within the token budget
+    refined_context = rag.retrieve_for_objectives(
+        split_objectives(state['objectives']),
+        token_budget=NODE_BUDGETS["gather_context"],
+        max_age_seconds=RAG_MAX_AGE_SECONDS
+    )
     if not refined_context:
-        refined_context = "\n".join(raw_results[:2])
-    
-    # Limit content length for faster LLM processing
-    refined_context = refined_context[:2500]
-    
-    # Step 3: Format content into structured study guide using LLM
-    llm = get_llm()
-    format_prompt = f"""
+        # Most salient raw snippets within the same token budget
+        refined_context = fit_context("gather_context", "\n".join(raw_results), state['objectives'])
+    return refined_context
+
+async def _aretrieve(rag, state: LearningState, results):
+    """Async _retrieve()"""
+    raw_results = [r['body'] for r in results]
+    metadatas = [{"source": r.get('href', '')} for r in results]
+
+    added = await rag.aadd_documents(raw_results, metadatas=metadatas)
+    print(f"Embedded {added} new chunks from {len(raw_results)} search results")
+
+    refined_context = await rag.aretrieve_for_objectives(
+        split_objectives(state['objectives']),
+        token_budget=NODE_BUDGETS["gather_context"],
+        max_age_seconds=RAG_MAX_AGE_SECONDS
+    )
+    if not refined_context:
+        refined_context = await asyncio.to_thread(
+            fit_context, "gather_context", "\n".join(raw_results), state['objectives']
+        )
+    return refined_context
+
+def _format_prompt(state: LearningState, refined_context):
+    return f"""
     Create a well-structured study material for the topic: {state['topic']}
     
     Learning Objectives: {state['objectives']}
@@ -55,10 +105,81 @@ def gather_context_node(state: LearningState):
     
     Keep it concise, educational, and focused on the learning objectives.
     """
+
+def _flight_key(state: LearningState):
+    return flight_key("gather_context", state['topic'], state['objectives'], state.get("search_retry_count", 0))
+
+def gather_context_node(state: LearningState):
+    """Gathers learning materials via web search and formats them using RAG + LLM
+
+    Concurrent gathers for the same checkpoint share one computation.
+    """
+    return coalesce(_flight_key(state), lambda: _gather(state))
+
+async def agather_context_node(state: LearningState):
+    """Async gather_context_node()"""
+    return await acoalesce(_flight_key(state), lambda: _agather(state))
+
+def _gather(state: LearningState):
+    with track_fallback() as fallback:
+        result = _gather_material(state)
+    return {**result, "context_degraded": fallback.used}
+
+async def _agather(state: LearningState):
+    with track_fallback() as fallback:
+        result = await _agather_material(state)
+    return {**result, "context_degraded": fallback.used}
+
+def _gather_material(state: LearningState):
+    print(f"--- [GATHERING] {state['topic']} ---")
+
+    stored = _stored_material(state)
+    if stored:
+        return stored
     
+    # Step 1: Web search for learning materials
+    try:
+        # Cached search: fresh/stale hits skip the network, failures fall back to stale results
+        results = web_search(_search_query(state), max_results=8, refresh=_retrying(state))
+    except Exception as e:
+        print(f"Search error: {e}")
+        return {"gathered_context": GATHER_ERROR}
+
+    # Step 2: Semantic retrieval over the topic corpus
+    refined_context = _retrieve(RAGManager(collection_name=state['topic']), state, results)
+    
+    # Step 3: Format content into structured study guide using LLM
+    try:
+        formatted_content = stream_llm(get_llm(cache=not _retrying(state), node="gather_context"), _format_prompt(state, refined_context), node="gather_context")
+        return {"gathered_context": formatted_content}
+    except Exception as e:
+        print(f"Formatting error: {e}")
+        return {"gathered_context": refined_context}
+
+async def _agather_material(state: LearningState):
+    """Async _gather_material(): the web search overlaps with opening the vector store and embedding model"""
+    print(f"--- [GATHERING] {state['topic']} ---")
+
+    stored = _stored_material(state)
+    if stored:
+        return stored
+
+    search, rag = await asyncio.gather(
+        aweb_search(_search_query(state), max_results=8, refresh=_retrying(state)),
+        asyncio.to_thread(RAGManager, collection_name=state['topic']),
+        return_exceptions=True
+    )
+    if isinstance(search, Exception):
+        print(f"Search error: {search}")
+        return {"gathered_context": GATHER_ERROR}
+    if isinstance(rag, Exception):
+        raise rag
+
+    refined_context = await _aretrieve(rag, state, search)
+
     try:
-        formatted_content = llm.invoke(format_prompt).content
+        formatted_content = await astream_llm(get_llm(cache=not _retrying(state), node="gather_context"), _format_prompt(state, refined_context), node="gather_context")
         return {"gathered_context": formatted_content}
     except Exception as e:
         print(f"Formatting error: {e}")
-        return {"gathered_context": refined_context}
\ No newline at end of file
+        return {"gathered_context": refined_context}
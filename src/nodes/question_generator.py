@@ -1,39 +1,168 @@
 """Question Generation Node - Creates MCQ assessments"""
+import asyncio
 from src.state import LearningState
-from src.utils import get_llm
+from src.utils import astream_llm, get_llm, stream_llm, track_fallback
+from src.quiz import ANSWER_LINE, parse_question_set, split_questions
+from src.curriculum_store import questions_key
+from src.nodes.gatherer import gather_failed
+from src.prompting import fit_context
+from src.singleflight import acoalesce, coalesce, flight_key
+from src.question_bank import (
+    BANK_SETS, QUESTIONS_PER_QUIZ, get_question_bank, parse_bank_questions, question_fingerprint, render_quiz
+)
 
-def generate_questions_node(state: LearningState):
-    """Generates exactly 5 MCQs based on learning context and objectives"""
-    print(f"--- [GENERATING MCQs] {state['topic']} ---")
-    
-    llm = get_llm()
-    
-    prompt = f"""
-    Context: {state['gathered_context']}
-    Create EXACTLY 5 Multiple Choice Questions (MCQs) for the topic: {state['topic']}.
-    
+def _build_prompt(state: LearningState, count, avoid=()):
+    """MCQ prompt for count questions, steering away from the given question stems"""
+    avoid_block = ""
+    if avoid:
+        listed = "\n".join(f"    - {text.strip().splitlines()[0]}" for text in avoid)
+        avoid_block = f"""
+    Do NOT repeat or rephrase any of these existing questions:
+{listed}
+    """
+    return f"""
+    Context: {fit_context("generate_questions", state['gathered_context'], state['objectives'])}
+    Create EXACTLY {count} Multiple Choice Questions (MCQs) for the topic: {state['topic']}.
+    {avoid_block}
     STRICT RULES:
-    1. Generate EXACTLY 5 questions, no more, no less.
-    2. Do NOT include correct answers, keys, or explanations.
-    3. Provide only questions and options A, B, C, and D.
+    1. Generate EXACTLY {count} questions, no more, no less.
+    2. Provide options A, B, C, and D, followed by one ANSWER line with the correct letter.
+    3. Do NOT include explanations.
     4. Ensure questions assess: {state['objectives']}
-    5. Number each question clearly (1, 2, 3, 4, 5).
-    
+    5. Number each question clearly (1, 2, 3, ...).
+
     FORMAT:
     1. [Question]
        A) [Option]
        B) [Option]
        C) [Option]
        D) [Option]
-    
+       ANSWER: [A, B, C or D]
+
     2. [Question]
        A) [Option]
        B) [Option]
        C) [Option]
        D) [Option]
-    
-    [Continue for exactly 5 questions]
+       ANSWER: [A, B, C or D]
+
+    [Continue for exactly {count} questions]
     """
-    
-    response = llm.invoke(prompt).content
-    return {"questions": [response]}
\ No newline at end of file
+
+def _generate_bank_batch(state: LearningState, bank, key):
+    """One LLM call producing several quizzes' worth of new questions for the bank"""
+    existing = [q["text"] for q in bank.questions(key)]
+    prompt = _build_prompt(state, QUESTIONS_PER_QUIZ * BANK_SETS, avoid=existing)
+    response = get_llm(cache=False, node="question_bank").invoke(prompt)
+    if response.response_metadata.get("fallback"):
+        return []  # Offline fallback questions are not banked
+    return parse_bank_questions(response.content)
+
+def _bank(state: LearningState):
+    """The question bank, unless gathering failed or the material came from the offline fallback model"""
+    if state.get("context_degraded") or gather_failed(state.get("gathered_context")):
+        return None
+    return get_question_bank()
+
+def _draw(state: LearningState, bank, key, seen):
+    """A quiz from the bank, waiting for an in-flight top-up when the bank is exhausted"""
+    if not bank:
+        return None
+    drawn = bank.draw(key, seen)
+    if drawn is None and bank.wait_for_top_up(key):
+        drawn = bank.draw(key, seen)
+    return drawn
+
+def _fresh_prompt(state: LearningState, bank, key, retake):
+    avoid = [q["text"] for q in bank.questions(key)] if bank and retake else ()
+    return _build_prompt(state, QUESTIONS_PER_QUIZ, avoid=avoid)
+
+def _parse_fresh(response, state: LearningState, bank, key, seed=True):
+    """Splits a generated quiz from its answer key and, if seed, seeds the bank with its questions"""
+    # Keep the answer key server-side; learners only see the rendered questions
+    questions_text, answer_key = parse_question_set(response)
+    if len(answer_key) != len(split_questions(questions_text)):
+        print("Warning: Incomplete answer key, grading will fall back to the LLM")
+        answer_key = []
+    elif bank and seed:
+        bank.add(key, state['topic'], parse_bank_questions(response))
+    return questions_text, answer_key
+
+def _fresh_quiz(state: LearningState, bank, key, retake):
+    """A newly generated quiz; concurrent first quizzes for the same material share one generation"""
+    def generate():
+        prompt = _fresh_prompt(state, bank, key, retake)
+        with track_fallback() as fallback:
+            # Stream the quiz as it is written, withholding the ANSWER lines
+            response = stream_llm(get_llm(cache=not retake, node="generate_questions"), prompt, node="generate_questions", hidden_lines=ANSWER_LINE)
+        return _parse_fresh(response, state, bank, key, seed=not fallback.used)
+
+    # Retakes must differ from the learner's previous quiz, so they are never shared
+    return generate() if retake else coalesce(_flight_key(state, key), generate)
+
+async def _afresh_quiz(state: LearningState, bank, key, retake):
+    """Async _fresh_quiz()"""
+    async def generate():
+        prompt = await asyncio.to_thread(_fresh_prompt, state, bank, key, retake)
+        with track_fallback() as fallback:
+            response = await astream_llm(get_llm(cache=not retake, node="generate_questions"), prompt, node="generate_questions", hidden_lines=ANSWER_LINE)
+        return await asyncio.to_thread(_parse_fresh, response, state, bank, key, not fallback.used)
+
+    return await (generate() if retake else acoalesce(_flight_key(state, key), generate))
+
+def _flight_key(state: LearningState, key):
+    return flight_key("generate_questions", state['topic'], state['objectives'], key)
+
+def _is_retake(state: LearningState):
+    """A quiz was already shown or graded for this checkpoint, so the learner needs a fresh one
+
+    Not inferred from answer_key, which is empty when a quiz's answer lines
+    failed to parse.
+    """
+    return bool(state.get('seen_questions') or state.get('question_results'))
+
+def _result(state: LearningState, bank, key, seen, questions_text, answer_key):
+    seen = seen + [question_fingerprint(block) for block in split_questions(questions_text)]
+    if bank and answer_key and len(bank.unseen(key, seen)) < QUESTIONS_PER_QUIZ:
+        # Refill before the learner needs a retake
+        bank.top_up(key, state['topic'], lambda: _generate_bank_batch(state, bank, key))
+    return {"questions": [questions_text], "answer_key": answer_key, "seen_questions": seen}
+
+def generate_questions_node(state: LearningState):
+    """Generates exactly 5 MCQs based on learning context and objectives
+
+    With the question bank enabled, quizzes are drawn from the checkpoint's
+    bank without repeating questions this learner has seen; the bank is
+    topped up in the background when it runs low.
+    """
+    print(f"--- [GENERATING MCQs] {state['topic']} ---")
+
+    retake = _is_retake(state)
+    bank = _bank(state)
+    key = questions_key(state['gathered_context'])
+    seen = list(state.get('seen_questions') or [])
+
+    drawn = _draw(state, bank, key, seen)
+    if drawn:
+        print(f"--- [QUESTION BANK] Served quiz for {state['topic']} ---")
+        questions_text, answer_key = render_quiz(drawn)
+    else:
+        questions_text, answer_key = _fresh_quiz(state, bank, key, retake)
+    return _result(state, bank, key, seen, questions_text, answer_key)
+
+async def agenerate_questions_node(state: LearningState):
+    """Async generate_questions_node(): bank and prompt work run in worker threads, the quiz streams via astream"""
+    print(f"--- [GENERATING MCQs] {state['topic']} ---")
+
+    retake = _is_retake(state)
+    bank = _bank(state)
+    key = questions_key(state['gathered_context'])
+    seen = list(state.get('seen_questions') or [])
+
+    drawn = await asyncio.to_thread(_draw, state, bank, key, seen)
+    if drawn:
+        print(f"--- [QUESTION BANK] Served quiz for {state['topic']} ---")
+        questions_text, answer_key = render_quiz(drawn)
+    else:
+        questions_text, answer_key = await _afresh_quiz(state, bank, key, retake)
+    return await asyncio.to_thread(_result, state, bank, key, seen, questions_text, answer_key)
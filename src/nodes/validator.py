@@ -1,33 +1,83 @@
 """Context Validation Node - Verifies learning material quality"""
+import asyncio
 from src.state import LearningState
-from src.utils import get_llm
+from src.utils import get_llm, track_fallback
+from src.coverage import local_relevance_score
+from src.prompting import fit_context
+from src.curriculum_store import get_curriculum_store, material_key
+from src.nodes.gatherer import gather_failed
 import re
 
-def validate_context_node(state: LearningState):
-    """Validates if gathered context adequately covers learning objectives"""
-    print(f"--- [VALIDATING CONTEXT] ---")
-    
-    llm = get_llm()
-    current_retries = state.get("search_retry_count", 0) + 1
-    
-    prompt = f"""
+def _judge_prompt(state: LearningState):
+    return f"""
     Topic: {state['topic']}
     Objectives: {state['objectives']}
-    Context: {state['gathered_context']}
+    Context: {fit_context("validate_context", state['gathered_context'], state['objectives'])}
 
     TASK:
     1. Check if the context covers all objectives.
-    2. Provide a FINAL_SCORE from 1-5 (4+ is passing).
+    2. Provide a FINAL_SCORE from 1-5 (4+ is passing). Keep the reasoning brief.
+    3. End your answer with a line in exactly this format: FINAL_SCORE: [number]
     """
-    
-    response = llm.invoke(prompt).content
-    
-    # Extract score from response
+
+def _parse_score(response):
+    """Extracts the judge's score, defaulting to 1"""
     try:
-        score_match = re.search(r'FINAL_SCORE:\s*(\d)', response)
+        score_match = re.search(r'FINAL_SCORE:\s*\**\s*(\d)', response)
         score = int(score_match.group(1)) if score_match else 1
     except:
         score = 1
-        
+    return score
+
+def _llm_relevance_score(state: LearningState):
+    """Asks the LLM judge for a 1-5 relevance score"""
+    return _parse_score(get_llm(node="validate_context").invoke(_judge_prompt(state)).content)
+
+async def _allm_relevance_score(state: LearningState):
+    prompt = await asyncio.to_thread(_judge_prompt, state)
+    return _parse_score((await get_llm(node="validate_context").ainvoke(prompt)).content)
+
+def _local_score(state: LearningState, context):
+    """Returns (score, ambiguous) from embedding coverage; ambiguous or unusable context needs the judge"""
+    if gather_failed(context):
+        return 1, False
+    # Fast path: embedding coverage of each objective; only ambiguous cases reach the LLM
+    try:
+        score, ambiguous, coverage = local_relevance_score(state['objectives'], context)
+        print(f"Objective coverage: {', '.join(f'{obj}={sim:.2f}' for obj, sim in coverage.items())}")
+    except Exception as e:
+        print(f"Local coverage scoring failed: {e}")
+        score, ambiguous = None, True
+    return score, ambiguous
+
+def _result(state: LearningState, context, score, degraded=False):
     print(f"Context Relevance Score: {score}/5")
-    return {"relevance_score": score, "search_retry_count": current_retries}
\ No newline at end of file
+
+    # Only material that passed validation, written and judged by the routed models, is reused for later learners
+    store = get_curriculum_store()
+    if store and score >= 4 and not degraded and not state.get("context_degraded"):
+        store.put("material", material_key(state['topic'], state['objectives']), state['topic'],
+                  {"content": context, "relevance_score": score})
+    return {"relevance_score": score, "search_retry_count": state.get("search_retry_count", 0) + 1}
+
+def validate_context_node(state: LearningState):
+    """Validates if gathered context adequately covers learning objectives"""
+    print(f"--- [VALIDATING CONTEXT] ---")
+    context = state.get('gathered_context') or ""
+
+    score, ambiguous = _local_score(state, context)
+    with track_fallback() as fallback:
+        if ambiguous:
+            score = _llm_relevance_score(state)
+    return _result(state, context, score, fallback.used)
+
+async def avalidate_context_node(state: LearningState):
+    """Async validate_context_node(): embedding scoring runs in a worker thread, the judge is awaited"""
+    print(f"--- [VALIDATING CONTEXT] ---")
+    context = state.get('gathered_context') or ""
+
+    score, ambiguous = await asyncio.to_thread(_local_score, state, context)
+    with track_fallback() as fallback:
+        if ambiguous:
+            score = await _allm_relevance_score(state)
+    return await asyncio.to_thread(_result, state, context, score, fallback.used)
@@ -1,19 +1,27 @@
 """Answer Verification Node - Grades learner responses"""
+import asyncio
 import re
 from src.state import LearningState
 from src.utils import get_llm
+from src.quiz import grade_answers
+from src.prompting import fit_context, quiz_text
 
-def verify_understanding_node(state: LearningState):
-    """Evaluates learner answers and calculates understanding score"""
-    print(f"--- [VERIFYING ANSWERS] ---")
-    
-    llm = get_llm()
-    
-    prompt = f"""
+def _grade_locally(state: LearningState):
+    """Grades against the hidden answer key, or returns None when none was generated"""
+    answer_key = state.get('answer_key') or []
+    if not answer_key:
+        return None
+    questions_text = state['questions'][0] if state.get('questions') else ""
+    score, results = grade_answers(questions_text, answer_key, state['learner_answers'])
+    print(f"Graded locally: {sum(r['is_correct'] for r in results)}/{len(results)} correct")
+    return {"understanding_score": score, "question_results": results}
+
+def _grader_prompt(state: LearningState):
+    return f"""
     You are a strict academic grader. 
     
-    CONTEXT: {state['gathered_context']}
-    MCQ QUESTIONS: {state['questions']}
+    CONTEXT: {fit_context("verify_understanding", state['gathered_context'], state['objectives'])}
+    MCQ QUESTIONS: {quiz_text(state)}
     LEARNER ANSWERS: {state['learner_answers']}
 
     TASK:
@@ -21,16 +29,34 @@ def verify_understanding_node(state: LearningState):
     2. Find the correct answer for each question based ONLY on the CONTEXT.
     3. Compare learner's answers to correct answers.
     4. Calculate score: (Correct answers / 5) * 100.
-    5. Provide result in format: FINAL_PERCENTAGE: [number]
+    5. Keep the reasoning brief, then give the result in format: FINAL_PERCENTAGE: [number]
     """
-    
-    response = llm.invoke(prompt).content
-    
+
+def _parse_grade(response):
     # Extract percentage from response
     try:
         match = re.search(r"FINAL_PERCENTAGE:\s*(\d+)", response)
         score = int(match.group(1)) if match else 0
     except Exception:
         score = 0
-        
-    return {"understanding_score": score}
\ No newline at end of file
+    return {"understanding_score": score, "question_results": []}
+
+def verify_understanding_node(state: LearningState):
+    """Evaluates learner answers and calculates understanding score"""
+    print(f"--- [VERIFYING ANSWERS] ---")
+
+    # Grade locally against the hidden answer key when one was generated
+    graded = _grade_locally(state)
+    if graded:
+        return graded
+    return _parse_grade(get_llm(node="verify_understanding").invoke(_grader_prompt(state)).content)
+
+async def averify_understanding_node(state: LearningState):
+    """Async verify_understanding_node(): only the LLM fallback grader is awaited"""
+    print(f"--- [VERIFYING ANSWERS] ---")
+
+    graded = _grade_locally(state)
+    if graded:
+        return graded
+    prompt = await asyncio.to_thread(_grader_prompt, state)
+    return _parse_grade((await get_llm(node="verify_understanding").ainvoke(prompt)).content)
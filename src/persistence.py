@@ -0,0 +1,18 @@
+"""Persistence Helpers - Shared SQLite connection handling and enable flags for the on-disk caches and stores"""
+import os
+import sqlite3
+from contextlib import contextmanager
+
+@contextmanager
+def connect(path):
+    """Yields a short-lived connection to path (safe to use from any thread), committing on exit"""
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+def enabled(env_var):
+    """False when env_var is set to 0/false/no; features are on by default"""
+    return os.getenv(env_var, "true").lower() not in ("0", "false", "no")
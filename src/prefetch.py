@@ -0,0 +1,104 @@
+"""Checkpoint Prefetcher - Prepares upcoming checkpoints in the background"""
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.state import initial_state
+
+# Shared across sessions so background work stays bounded per process
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PREFETCH_WORKERS", "4")),
+    thread_name_prefix="prefetch"
+)
+
+class CheckpointPrefetcher:
+    """Runs gather -> validate -> generate_questions for the next k checkpoints ahead of the learner"""
+
+    def __init__(self, graph, checkpoints, lookahead=None, config_for=None):
+        self.graph = graph
+        self.checkpoints = checkpoints
+        self.config_for = config_for  # idx -> run config, for graphs with a checkpointer
+        self.lookahead = int(os.getenv("PREFETCH_LOOKAHEAD", "2")) if lookahead is None else lookahead
+        self._futures = {}
+        self._running = set()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def _run(self, idx):
+        """Drives the graph for one checkpoint, stopping at node boundaries if cancelled"""
+        if self._cancelled.is_set():
+            return None
+        with self._lock:
+            self._running.add(idx)
+        try:
+            checkpoint = self.checkpoints[idx]
+            config = self.config_for(idx) if self.config_for else None
+            if config:
+                saved = self.graph.get_state(config).values
+                if saved.get("questions"):
+                    return saved  # Prepared before a restart
+            print(f"--- [PREFETCH] Checkpoint {idx + 1}: {checkpoint['topic']} ---")
+            final_state = None
+            for final_state in self.graph.stream(
+                initial_state(checkpoint['topic'], checkpoint['obj']), config=config, stream_mode="values"
+            ):
+                if self._cancelled.is_set():
+                    print(f"--- [PREFETCH] Cancelled checkpoint {idx + 1} ---")
+                    return None
+            return final_state
+        except Exception as e:
+            print(f"--- [PREFETCH] Checkpoint {idx + 1} failed: {type(e).__name__}: {e} ---")
+            raise
+        finally:
+            with self._lock:
+                self._running.discard(idx)
+
+    def schedule(self, current_idx):
+        """Queues checkpoints current_idx+1 .. current_idx+lookahead that are not yet prefetched"""
+        if self._cancelled.is_set():
+            return
+        last = min(current_idx + self.lookahead, len(self.checkpoints) - 1)
+        for idx in range(current_idx + 1, last + 1):
+            with self._lock:
+                if idx in self._futures:
+                    continue
+                # Carry the caller's context (e.g. LLM session ID) into the worker
+                ctx = contextvars.copy_context()
+                self._futures[idx] = _executor.submit(ctx.run, self._run, idx)
+
+    def status(self, idx):
+        """Returns 'queued', 'running', 'ready', 'failed', 'cancelled' or None if never scheduled"""
+        with self._lock:
+            future = self._futures.get(idx)
+            running = idx in self._running
+        if future is None:
+            return None
+        if future.cancelled():
+            return "cancelled"
+        if not future.done():
+            return "running" if running else "queued"
+        if future.exception() is not None or future.result() is None:
+            return "failed"
+        return "ready"
+
+    def take(self, idx):
+        """Returns the prefetched state for idx, waiting if it is still in flight (None if unavailable)"""
+        with self._lock:
+            future = self._futures.pop(idx, None)
+        if future is None or self._cancelled.is_set():
+            return None
+        if not future.done() and idx not in self._running and future.cancel():
+            return None  # Not started yet - caller is better off running it directly
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Prefetch error for checkpoint {idx + 1}: {e}")
+            return None
+
+    def cancel(self):
+        """Abandons all prefetch work, e.g. when the learner changes topic"""
+        self._cancelled.set()
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
@@ -0,0 +1,108 @@
+"""Prompt Assembly - Per-node token budgets and extractive compression of context before LLM calls"""
+import functools
+import os
+import re
+import threading
+from src.resources import get_embedding_function
+from src.scheduler import estimate_tokens
+from src.telemetry import annotate
+
+# Tokens of study material / source text each node may put in its prompt
+NODE_BUDGETS = {
+    "gather_context": int(os.getenv("RAG_TOKEN_BUDGET", "625")),
+    "validate_context": int(os.getenv("PROMPT_BUDGET_VALIDATE", "1000")),
+    "generate_questions": int(os.getenv("PROMPT_BUDGET_QUESTIONS", "700")),
+    "verify_understanding": int(os.getenv("PROMPT_BUDGET_VERIFY", "700")),
+    "feynman_teaching": int(os.getenv("PROMPT_BUDGET_FEYNMAN", "500")),
+}
+
+_stats_lock = threading.Lock()
+_stats = {}  # node -> {"calls", "compressed", "tokens_in", "tokens_out"}
+
+def split_units(text):
+    """Splits text into ordered extractive units: headings/list items by line, prose by sentence"""
+    units = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(("#", "-", "*", "•")) or re.match(r"\d+[.)]\s", line):
+            units.append(line)
+        else:
+            units.extend(s for s in re.split(r"(?<=[.!?])\s+", line) if s)
+    return units
+
+def _truncate(text, budget):
+    """Fallback: keeps the leading units that fit the budget"""
+    kept, used = [], 0
+    for unit in split_units(text):
+        cost = estimate_tokens(unit) + 1
+        if used + cost > budget:
+            break
+        kept.append(unit)
+        used += cost
+    return "\n".join(kept)
+
+@functools.lru_cache(maxsize=256)
+def _compress(text, objectives, budget):
+    """Greedy extractive selection by embedding salience against the objectives, in original order"""
+    from src.coverage import normalize_rows, split_objectives  # NumPy loads on first compression
+
+    units = split_units(text)
+    objective_list = split_objectives(objectives)
+    if not units or not objective_list:
+        return _truncate(text, budget)
+
+    vectors = normalize_rows(get_embedding_function()(objective_list + units))
+    salience = (vectors[len(objective_list):] @ vectors[:len(objective_list)].T).max(axis=1)
+
+    # Headings are nearly free and keep the structure readable
+    order = sorted(range(len(units)), key=lambda i: (not units[i].startswith("#"), -salience[i]))
+    chosen, used = set(), 0
+    for i in order:
+        cost = estimate_tokens(units[i]) + 1
+        if used + cost <= budget:
+            chosen.add(i)
+            used += cost
+    # Drop headings whose section kept nothing
+    kept = [i for i in sorted(chosen)
+            if not units[i].startswith("#") or (i + 1 < len(units) and i + 1 in chosen)]
+    return "\n".join(units[i] for i in kept)
+
+def fit_context(node, text, objectives="", budget=None):
+    """Returns text compressed to the node's token budget, logging the tokens saved"""
+    text = text or ""
+    budget = NODE_BUDGETS.get(node, 1000) if budget is None else budget
+    tokens_in = estimate_tokens(text)
+    fitted = text
+    if tokens_in > budget:
+        try:
+            fitted = _compress(text, objectives or "", budget)
+        except Exception as e:
+            print(f"Context compression failed, truncating: {e}")
+            fitted = _truncate(text, budget)
+    tokens_out = estimate_tokens(fitted)
+
+    with _stats_lock:
+        stats = _stats.setdefault(node, {"calls": 0, "compressed": 0, "tokens_in": 0, "tokens_out": 0})
+        stats["calls"] += 1
+        stats["compressed"] += fitted is not text
+        stats["tokens_in"] += tokens_in
+        stats["tokens_out"] += tokens_out
+    if fitted is not text:
+        print(f"--- [PROMPT] {node}: context {tokens_in} -> {tokens_out} tokens (saved {tokens_in - tokens_out}) ---")
+    annotate(**{"prompt.context_tokens": tokens_out, "prompt.tokens_saved": tokens_in - tokens_out})
+    return fitted
+
+def quiz_text(state):
+    """The rendered quiz only (not the whole questions list repr)"""
+    questions = state.get("questions") or []
+    return str(questions[0]) if questions else ""
+
+def prompt_stats():
+    """Per-node context token counts before and after fitting"""
+    with _stats_lock:
+        return {
+            node: {**stats, "tokens_saved": stats["tokens_in"] - stats["tokens_out"]}
+            for node, stats in _stats.items()
+        }
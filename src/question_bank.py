@@ -0,0 +1,173 @@
+"""Question Bank - Per-checkpoint pools of MCQs so retakes are served without waiting on the LLM"""
+import contextvars
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from src.curriculum_store import get_curriculum_store
+from src.persistence import enabled
+from src.quiz import parse_question_set, split_questions
+
+QUESTIONS_PER_QUIZ = 5
+# Quizzes' worth of questions requested by one batched top-up
+BANK_SETS = int(os.getenv("QUESTION_BANK_SETS", "3"))
+# Word-set Jaccard similarity at which two questions count as the same
+DEDUP_THRESHOLD = float(os.getenv("QUESTION_DEDUP_THRESHOLD", "0.8"))
+# Banks held in memory before least recently used ones are dropped (they reload from the store)
+MEMORY_BANKS = int(os.getenv("QUESTION_BANK_MEMORY_BANKS", "256"))
+# Longest a quiz waits on an in-flight top-up before it is generated fresh instead
+TOP_UP_WAIT_SECONDS = float(os.getenv("QUESTION_BANK_WAIT_SECONDS", "30"))
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="question-bank")
+
+def _stem(text):
+    """Question line without its number, lowercased"""
+    first_line = text.strip().split("\n", 1)[0]
+    return re.sub(r"^\s*\d+\.\s*", "", first_line).strip().lower()
+
+def question_fingerprint(text):
+    """Stable ID for a question, used to track what a learner has already seen"""
+    return hashlib.sha256(" ".join(re.findall(r"\w+", _stem(text))).encode("utf-8")).hexdigest()[:16]
+
+def _words(text):
+    return set(re.findall(r"\w+", _stem(text)))
+
+def is_near_duplicate(a, b, threshold=DEDUP_THRESHOLD):
+    """True when two questions' stems share at least threshold of their words (Jaccard)"""
+    words_a, words_b = _words(a), _words(b)
+    if not words_a or not words_b:
+        return False
+    return len(words_a & words_b) / len(words_a | words_b) >= threshold
+
+def parse_bank_questions(response):
+    """Splits LLM quiz output into [{"text", "answer"}], dropping questions without exactly one answer"""
+    questions = []
+    for block in split_questions(response):
+        text, key = parse_question_set(block)
+        if len(key) == 1:
+            questions.append({"text": re.sub(r"^\s*\d+\.\s*", "", text), "answer": key[0]})
+    return questions
+
+def render_quiz(questions):
+    """Numbers a list of bank questions into (questions_text, answer_key)"""
+    text = "\n\n".join(f"{i}. {q['text']}" for i, q in enumerate(questions, 1))
+    return text, [q["answer"] for q in questions]
+
+class QuestionBank:
+    """Deduplicated question pools keyed by study material, persisted in the curriculum store"""
+
+    def __init__(self, store=None, threshold=DEDUP_THRESHOLD, max_banks=MEMORY_BANKS):
+        self.store = store
+        self.threshold = threshold
+        self.max_banks = max_banks
+        self.stats = {"quizzes_served": 0, "questions_added": 0, "duplicates_dropped": 0,
+                      "topups": 0, "topup_failures": 0}
+        self._banks = OrderedDict()  # key -> [{"text", "answer"}], least recently used first
+        self._topups = {}  # key -> Future of an in-flight top-up
+        self._lock = threading.Lock()
+
+    def _load(self, key):
+        """Bank for key from memory, falling back to the store (caller holds the lock)"""
+        if key not in self._banks:
+            stored = self.store.get("questions", key) if self.store else None
+            self._banks[key] = list(stored["questions"]) if stored else []
+        self._banks.move_to_end(key)
+        while len(self._banks) > self.max_banks:
+            self._banks.popitem(last=False)
+        return self._banks[key]
+
+    def questions(self, key):
+        """All questions banked for key"""
+        with self._lock:
+            return list(self._load(key))
+
+    def add(self, key, topic, questions):
+        """Adds questions that are not near-duplicates of banked ones; returns how many were added"""
+        with self._lock:
+            bank = self._load(key)
+            added = 0
+            for question in questions:
+                if any(is_near_duplicate(question["text"], other["text"], self.threshold) for other in bank):
+                    self.stats["duplicates_dropped"] += 1
+                    continue
+                bank.append(question)
+                added += 1
+            self.stats["questions_added"] += added
+            snapshot = list(bank)
+        if added and self.store:
+            self.store.put("questions", key, topic, {"questions": snapshot})
+        return added
+
+    def unseen(self, key, seen):
+        """Banked questions whose fingerprints are not in seen"""
+        seen = set(seen or [])
+        return [q for q in self.questions(key) if question_fingerprint(q["text"]) not in seen]
+
+    def draw(self, key, seen, count=QUESTIONS_PER_QUIZ):
+        """Returns count unseen questions in bank order, or None if the bank cannot fill a quiz"""
+        available = self.unseen(key, seen)
+        if len(available) < count:
+            return None
+        with self._lock:
+            self.stats["quizzes_served"] += 1
+        return available[:count]
+
+    def top_up(self, key, topic, generate):
+        """Runs generate() in the background and banks its questions (one top-up per key at a time)"""
+        with self._lock:
+            if key in self._topups:
+                return
+            ctx = contextvars.copy_context()  # Keep the learner's LLM session for fair queueing
+            self._topups[key] = _executor.submit(ctx.run, self._run_top_up, key, topic, generate)
+
+    def _run_top_up(self, key, topic, generate):
+        try:
+            added = self.add(key, topic, generate())
+            print(f"--- [QUESTION BANK] Topped up {topic}: {added} new questions ---")
+            with self._lock:
+                self.stats["topups"] += 1
+        except Exception as e:
+            print(f"Question bank top-up error: {e}")
+            with self._lock:
+                self.stats["topup_failures"] += 1
+        finally:
+            with self._lock:
+                self._topups.pop(key, None)
+
+    def wait_for_top_up(self, key, timeout=TOP_UP_WAIT_SECONDS):
+        """Waits for an in-flight top-up for key; returns False if none was running or it did not finish in time"""
+        with self._lock:
+            future = self._topups.get(key)
+        if future is None:
+            return False
+        try:
+            future.result(timeout=timeout)
+        except TimeoutError:
+            print(f"--- [QUESTION BANK] Top-up still running after {timeout:g}s, generating fresh ---")
+            return False
+        return True
+
+    def bank_stats(self):
+        """Returns counters plus the number of banks and questions held in memory"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["banks"] = len(self._banks)
+            stats["questions"] = sum(len(bank) for bank in self._banks.values())
+            stats["topups_in_flight"] = len(self._topups)
+        return stats
+
+_bank = None
+_bank_lock = threading.Lock()
+
+def get_question_bank():
+    """Returns the process-wide question bank (None when disabled via QUESTION_BANK_ENABLED)"""
+    global _bank
+    if not enabled("QUESTION_BANK_ENABLED"):
+        return None
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None:
+                _bank = QuestionBank(store=get_curriculum_store())
+    return _bank
@@ -0,0 +1,56 @@
+"""Quiz Helpers - Parses generated MCQ sets, hides the answer key and grades locally"""
+import re
+
+OPTION_LETTERS = ("A", "B", "C", "D")
+
+ANSWER_LINE = re.compile(r"^\s*\**\s*(?:correct\s+)?answer\s*\**\s*[:\-]\s*\**\s*\(?([A-D])\b", re.IGNORECASE)
+_LEARNER_ANSWER = re.compile(r"(\d+)\s*[.):]\s*([A-D])", re.IGNORECASE)
+
+def split_questions(questions_text):
+    """Splits rendered quiz text into one block per numbered question"""
+    blocks = re.split(r"\n(?=\s*\d+\.)", questions_text.strip())
+    return [block.strip() for block in blocks if re.match(r"\d+\.", block.strip())]
+
+def parse_question_set(response):
+    """Separates the answer key from LLM quiz output
+
+    Returns (rendered_text, answer_key) where rendered_text has every ANSWER
+    line removed and answer_key holds one letter per question, in order.
+    """
+    rendered_lines = []
+    answer_key = []
+    for line in response.strip().split("\n"):
+        match = ANSWER_LINE.match(line)
+        if match:
+            answer_key.append(match.group(1).upper())
+        else:
+            rendered_lines.append(line)
+    return "\n".join(rendered_lines).strip(), answer_key
+
+def parse_learner_answers(learner_answers):
+    """Parses "1.A, 2.B, ..." into {question_number: letter}"""
+    return {int(num): letter.upper() for num, letter in _LEARNER_ANSWER.findall(learner_answers or "")}
+
+def grade_answers(questions_text, answer_key, learner_answers):
+    """Scores learner answers against the answer key
+
+    Returns (percentage, results) where results lists, per question, the
+    question text, selected and correct letters and whether it was right.
+    """
+    selected = parse_learner_answers(learner_answers)
+    blocks = split_questions(questions_text)
+    results = []
+    for number, correct in enumerate(answer_key, 1):
+        block = blocks[number - 1] if number <= len(blocks) else ""
+        choice = selected.get(number, "")
+        results.append({
+            "number": number,
+            "question": block,
+            "selected": choice,
+            "correct": correct,
+            "is_correct": choice == correct,
+        })
+    if not results:
+        return 0, results
+    score = round(100 * sum(r["is_correct"] for r in results) / len(results))
+    return score, results
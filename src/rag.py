@@ -1,52 +1,200 @@
 """RAG Manager - Handles vector storage and semantic retrieval"""
-import chromadb
-from chromadb.utils import embedding_functions
-import uuid
+import asyncio
+import hashlib
+import os
+import re
+import time
+import numpy as np
+from src.coverage import normalize_rows
+from src.resources import get_embedding_function
+from src.scheduler import estimate_tokens
+from src.telemetry import annotate, traced
+from src.vector_store import open_store
+
+CHUNK_CHARS = int(os.getenv("RAG_CHUNK_CHARS", "500"))
+EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "64"))
+MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+
+def content_id(text):
+    """Content-addressed document ID so identical snippets map to one entry"""
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()[:32]
+
+def chunk_text(text, max_chars=CHUNK_CHARS):
+    """Splits text into chunks of whole sentences, each at most max_chars long"""
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n{2,}", text) if s and s.strip()]
+    chunks = []
+    current = ""
+    for sentence in sentences:
+        # Hard-wrap sentences that are longer than a chunk on their own
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+def mmr_select(candidate_vectors, query_vectors, token_costs, token_budget, lambda_mult=MMR_LAMBDA):
+    """Maximal marginal relevance selection under a token budget
+
+    Relevance is a candidate's best similarity to any query. Returns the
+    selected candidate indices in selection order.
+    """
+    candidates = normalize_rows(candidate_vectors)
+    relevance = (candidates @ normalize_rows(query_vectors).T).max(axis=1)
+    redundancy = np.zeros(len(candidates), dtype=np.float32)  # Max similarity to anything selected
+    available = np.ones(len(candidates), dtype=bool)
+    costs = np.asarray(token_costs)
+    selected = []
+    remaining = token_budget
+
+    while True:
+        available &= costs <= remaining
+        if not available.any():
+            break
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        best = int(np.argmax(np.where(available, scores, -np.inf)))
+        selected.append(best)
+        remaining -= costs[best]
+        available[best] = False
+        redundancy = np.maximum(redundancy, candidates @ candidates[best])
+    return selected
 
 class RAGManager:
-    """Manages ChromaDB vector store for semantic search and retrieval"""
+    """Chunks, embeds and retrieves study material over a pluggable vector store (see src/vector_store.py)"""
     
-    def __init__(self, collection_name="learning_knowledge_base"):
-        """Initialize vector store with persistent storage"""
-        self.client = chromadb.PersistentClient(path="./chroma_db")
+    def __init__(self, collection_name="learning_knowledge_base", backend=None):
+        """Open the topic's collection on the configured backend (VECTOR_BACKEND unless given)"""
+        # Embedding model is shared process-wide (see src/resources.py)
+        self.embedding_fn = get_embedding_function()
         
-        # Initialize sentence transformer for embeddings
-        self.embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
-        )
-        
-        # Create or get collection with sanitized name
+        # One collection per topic with a sanitized name
         clean_name = "".join(c if c.isalnum() else "_" for c in collection_name)
-        self.collection = self.client.get_or_create_collection(
-            name=clean_name,
-            embedding_function=self.embedding_fn
-        )
+        self.store = open_store(clean_name, self.embedding_fn, backend)
+
+    @traced("rag.add_documents", kind="rag")
+    def add_documents(self, text_list, metadatas=None, batch_size=EMBED_BATCH_SIZE):
+        """Chunk text documents and add them to the vector database, embedding only new chunks
 
-    def add_documents(self, text_list):
-        """Add text documents to vector database"""
+        Returns the number of newly embedded chunks. Chunks already in the
+        collection just get their last_seen timestamp refreshed.
+        """
         if not text_list:
-            return
+            return 0
+
+        now = time.time()
+        metadatas = metadatas or [{} for _ in text_list]
+
+        # Sentence-aware chunks, deduplicated by content hash
+        unique = {}
+        for text, meta in zip(text_list, metadatas):
+            for chunk in chunk_text(text or ""):
+                unique.setdefault(content_id(chunk), (chunk, meta))
+        if not unique:
+            return 0
+
+        ids = list(unique)
+        existing = self.store.existing_ids(ids)
+        new_ids = [doc_id for doc_id in ids if doc_id not in existing]
+        annotate(**{"rag.collection": self.store.name, "rag.backend": self.store.backend,
+                    "rag.documents": len(text_list), "rag.chunks": len(ids), "rag.new_chunks": len(new_ids)})
 
-        # Generate unique IDs and add to collection
-        ids = [str(uuid.uuid4()) for _ in text_list]
-        self.collection.add(documents=text_list, ids=ids)
+        if existing:
+            # Metadata-only update: no re-embedding
+            self.store.touch([doc_id for doc_id in ids if doc_id in existing], now)
+        for start in range(0, len(new_ids), batch_size):
+            batch = new_ids[start:start + batch_size]
+            documents = [unique[doc_id][0] for doc_id in batch]
+            self.store.add(
+                batch,
+                documents,
+                self.embedding_fn(documents),  # One model pass per batch
+                [unique[doc_id][1].get("source") for doc_id in batch],
+                now
+            )
+        return len(new_ids)
+
+    @traced("rag.retrieve", kind="rag")
+    def retrieve(self, query, n_results=3, max_age_seconds=None, sources=None):
+        """Perform semantic search and return top n results
+
+        max_age_seconds keeps only documents seen in a recent search;
+        sources restricts results to the given source URLs.
+        """
+        count = self.store.count()
+        if count == 0:
+            return ""
+
+        documents, _ = self.store.query(
+            self.embedding_fn([query]),
+            n_results=min(n_results, count),
+            max_age_seconds=max_age_seconds,
+            sources=sources
+        )
+        return "\n\n".join(documents[0]) if documents else ""
+
+    @traced("rag.retrieve_for_objectives", kind="rag")
+    def retrieve_for_objectives(self, objectives, token_budget=600, per_objective=8,
+                                max_age_seconds=None, sources=None):
+        """Retrieve context covering every objective within a token budget
+
+        Runs one batched query with a query per objective, merges the
+        candidates and picks chunks by maximal marginal relevance until the
+        budget is spent.
+        """
+        count = self.store.count()
+        if count == 0 or not objectives:
+            return ""
 
-    def retrieve(self, query, n_results=3):
-        """Perform semantic search and return top n results"""
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results
+        query_vectors = self.embedding_fn(list(objectives))
+        hit_documents, hit_embeddings = self.store.query(
+            query_vectors,
+            n_results=min(per_objective, count),
+            max_age_seconds=max_age_seconds,
+            sources=sources
+        )
+
+        # Merge per-objective hits, keeping each chunk once
+        documents, vectors, seen = [], [], set()
+        for docs, embeddings in zip(hit_documents, hit_embeddings):
+            for doc, embedding in zip(docs, embeddings):
+                if doc not in seen:
+                    seen.add(doc)
+                    documents.append(doc)
+                    vectors.append(embedding)
+        if not documents:
+            return ""
+
+        costs = [estimate_tokens(doc) for doc in documents]
+        selected = mmr_select(vectors, query_vectors, costs, token_budget)
+        annotate(**{"rag.collection": self.store.name, "rag.objectives": len(objectives),
+                    "rag.candidates": len(documents), "rag.selected": len(selected),
+                    "rag.tokens": sum(costs[i] for i in selected)})
+        return "\n\n".join(documents[i] for i in selected)
+
+    async def aadd_documents(self, text_list, metadatas=None, batch_size=EMBED_BATCH_SIZE):
+        """add_documents() in a worker thread (Chroma and the embedding model are blocking)"""
+        return await asyncio.to_thread(self.add_documents, text_list, metadatas, batch_size)
+
+    async def aretrieve_for_objectives(self, objectives, token_budget=600, per_objective=8,
+                                       max_age_seconds=None, sources=None):
+        """retrieve_for_objectives() in a worker thread"""
+        return await asyncio.to_thread(
+            self.retrieve_for_objectives, objectives, token_budget, per_objective, max_age_seconds, sources
         )
-        return "\n\n".join(results['documents'][0]) if results['documents'] else ""
 
     def clear_collection(self):
         """Clear collection data for fresh content"""
         try:
-            collection_name = self.collection.name
-            self.client.delete_collection(collection_name)
-            self.collection = self.client.get_or_create_collection(
-                name=collection_name,
-                embedding_function=self.embedding_fn
-            )
+            self.store.clear()
         except Exception as e:
-            print(f"Warning: Could not clear collection: {e}")
\ No newline at end of file
+            print(f"Warning: Could not clear collection: {e}")
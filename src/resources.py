@@ -0,0 +1,108 @@
+"""Shared Resources - Process-wide warm pool for the embedding model and vector store client"""
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+CHROMA_PATH = "./chroma_db"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+_lock = threading.Lock()
+_embedding_fn = None
+_chroma_client = None
+_load_times = {}
+
+def _resident_memory_mb():
+    """Returns current resident memory of the process in MB (None if unknown)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except Exception:
+        pass
+    if resource is None:
+        return None
+    # Fall back to peak RSS (bytes on macOS, KB elsewhere)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def get_embedding_function():
+    """Returns the shared SentenceTransformer embedding function, loading it once"""
+    global _embedding_fn
+    if _embedding_fn is None:
+        with _lock:
+            if _embedding_fn is None:
+                from chromadb.utils import embedding_functions
+                start = time.perf_counter()
+                _embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
+                    model_name=EMBEDDING_MODEL
+                )
+                _load_times["embedding_model"] = time.perf_counter() - start
+    return _embedding_fn
+
+def get_chroma_client():
+    """Returns the shared persistent ChromaDB client, creating it once"""
+    global _chroma_client
+    if _chroma_client is None:
+        with _lock:
+            if _chroma_client is None:
+                import chromadb
+                start = time.perf_counter()
+                _chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
+                _load_times["chroma_client"] = time.perf_counter() - start
+    return _chroma_client
+
+def preload():
+    """Loads all shared resources up front and returns their stats"""
+    from src.vector_store import VECTOR_BACKEND
+
+    rss_before = _resident_memory_mb()
+    if VECTOR_BACKEND == "chroma":
+        get_chroma_client()
+    embedding_fn = get_embedding_function()
+    # Run one embedding so model weights are materialised, not just referenced
+    embedding_fn(["warm up"])
+    stats = resource_stats()
+    if rss_before is not None and stats["rss_mb"] is not None:
+        stats["preload_rss_delta_mb"] = round(stats["rss_mb"] - rss_before, 1)
+    print(f"--- [RESOURCES] Preloaded: {stats} ---")
+    return stats
+
+def warm_up():
+    """Compiles the shared graph, creates the LLM client and preloads models (meant for a background thread)"""
+    from src.graph import get_shared_graph
+    from src.utils import get_llm
+
+    start = time.perf_counter()
+    get_shared_graph()
+    _load_times["graph"] = time.perf_counter() - start
+    try:
+        get_llm()
+    except ValueError as e:
+        print(f"Warning: LLM client not warmed up: {e}")
+    preload()
+    start_maintenance()
+    print(f"--- [WARM-UP] Ready in {time.perf_counter() - start:.2f}s ---")
+
+def start_maintenance():
+    """Starts the background Chroma collector when the Chroma backend is in use"""
+    from src.chroma_gc import get_chroma_maintenance
+    from src.vector_store import VECTOR_BACKEND
+
+    maintenance = get_chroma_maintenance()
+    if VECTOR_BACKEND == "chroma" and maintenance:
+        maintenance.start()
+
+def resource_stats():
+    """Reports load times (seconds) and current resident memory (MB)"""
+    return {
+        "embedding_model_loaded": _embedding_fn is not None,
+        "chroma_client_loaded": _chroma_client is not None,
+        "load_seconds": {name: round(secs, 3) for name, secs in _load_times.items()},
+        "rss_mb": _resident_memory_mb(),
+    }
@@ -0,0 +1,351 @@
+"""LLM Scheduler - Process-wide rate limiting, fair queueing and retries for LLM calls"""
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from src.telemetry import annotate
+
+# Identifies the learner session an LLM call belongs to (used for fair queueing)
+current_session = contextvars.ContextVar("llm_session", default="default")
+
+def set_session(session_id):
+    """Tags LLM calls made from the current context with a session ID"""
+    current_session.set(str(session_id))
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token)"""
+    return max(1, len(str(text)) // 4)
+
+def _status_code(error):
+    """Extracts an HTTP status code from a provider exception, if any"""
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code
+
+def _retry_after(error):
+    """Reads the Retry-After header (seconds) from a provider exception, if any"""
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except Exception:
+        return None
+
+def is_retryable(error):
+    """True for rate-limit (429) and server-side (5xx) failures"""
+    code = _status_code(error)
+    return code == 429 or (code is not None and 500 <= code < 600)
+
+class _AsyncTicket:
+    """Queue ticket of an event-loop caller; wake() is safe from any thread"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.woken = None
+
+    def arm(self):
+        """A fresh future for the next wake-up (caller holds the scheduler lock)"""
+        self.woken = self.loop.create_future()
+        return self.woken
+
+    def wake(self):
+        woken = self.woken
+        if woken is not None:
+            try:
+                self.loop.call_soon_threadsafe(lambda: woken.done() or woken.set_result(None))
+            except RuntimeError:
+                pass  # Loop closed; its waiter is gone
+
+class LLMScheduler:
+    """Admits LLM calls under RPM/TPM budgets and a concurrency cap, round-robin across sessions"""
+
+    def __init__(self, requests_per_minute=30, tokens_per_minute=6000, max_concurrency=4,
+                 max_retries=4, base_delay=1.0, max_delay=30.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()  # session -> deque of waiting tickets
+        self._async_waiters = set()  # _AsyncTicket of event-loop callers currently waiting
+        self._in_flight = 0
+        self._requests = deque()  # admission timestamps within the last minute
+        self._tokens = deque()  # [timestamp, tokens] entries within the last minute
+
+        self._admitted = 0
+        self._retries = 0
+        self._failures = 0
+        self._tokens_total = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._recent_waits = deque(maxlen=500)
+
+    def _prune(self, now):
+        """Drops budget entries older than the one-minute window"""
+        while self._requests and now - self._requests[0] >= 60:
+            self._requests.popleft()
+        while self._tokens and now - self._tokens[0][0] >= 60:
+            self._tokens.popleft()
+
+    def _budget_wait(self, now, tokens):
+        """Seconds until a call of this size fits the RPM/TPM budgets (0 if it fits now)"""
+        self._prune(now)
+        wait = 0.0
+        if self.requests_per_minute and len(self._requests) >= self.requests_per_minute:
+            wait = max(wait, 60 - (now - self._requests[0]))
+        if self.tokens_per_minute and self._tokens:
+            used = sum(entry[1] for entry in self._tokens)
+            # A single oversized call is admitted once the window is empty
+            if used + tokens > self.tokens_per_minute:
+                wait = max(wait, 60 - (now - self._tokens[0][0]))
+        return wait
+
+    def _is_next(self, session, ticket):
+        """True if this ticket heads the session whose turn it is"""
+        first_session = next(iter(self._queues))
+        return first_session == session and self._queues[session][0] is ticket
+
+    def acquire(self, tokens):
+        """Blocks until the caller may start an LLM call; returns its token log entry"""
+        session = current_session.get()
+        ticket = object()
+        enqueued = time.monotonic()
+        with self._cond:
+            self._queues.setdefault(session, deque()).append(ticket)
+            while True:
+                wait = self._admission_wait(session, ticket, tokens)
+                if wait is not None and wait <= 0:
+                    return self._admit(session, tokens, enqueued)
+                self._cond.wait(timeout=wait)
+
+    def _admission_wait(self, session, ticket, tokens):
+        """0 if the ticket may start now, else seconds until the budget allows it (None: until notified)"""
+        if self._is_next(session, ticket) and self._in_flight < self.max_concurrency:
+            return self._budget_wait(time.monotonic(), tokens)
+        return None
+
+    def _admit(self, session, tokens, enqueued):
+        """Dequeues the session's head ticket and starts its call (caller holds the lock)"""
+        queue = self._queues[session]
+        queue.popleft()
+        if queue:
+            self._queues.move_to_end(session)  # Other sessions go first next time
+        else:
+            del self._queues[session]
+
+        now = time.monotonic()
+        entry = [now, tokens]
+        self._in_flight += 1
+        self._requests.append(now)
+        self._tokens.append(entry)
+        self._record_wait(now - enqueued)
+        self._notify()
+        return entry
+
+    def _notify(self):
+        """Wakes thread and event-loop waiters to re-check admission (caller holds the lock)"""
+        self._cond.notify_all()
+        for waiter in self._async_waiters:
+            waiter.wake()
+
+    def release(self, entry, actual_tokens=None):
+        """Marks a call finished, correcting its token usage if known"""
+        with self._cond:
+            if actual_tokens:
+                entry[1] = actual_tokens
+            self._tokens_total += entry[1]
+            self._in_flight -= 1
+            self._notify()
+
+    def _record_wait(self, waited):
+        """Tracks queue wait-time metrics (caller holds the lock)"""
+        self._admitted += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._recent_waits.append(waited)
+
+    def _backoff(self, attempt, error):
+        """Full-jitter exponential backoff, honouring Retry-After when present"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def _retry_delay(self, attempt, error, started=False):
+        """Returns the backoff before retrying a failed call, or None if the error must be raised"""
+        if started or not is_retryable(error) or attempt >= self.max_retries:
+            annotate(**{"llm.retries": attempt, "llm.error_status": _status_code(error)})
+            with self._cond:
+                self._failures += 1
+            return None
+        delay = self._backoff(attempt, error)
+        with self._cond:
+            self._retries += 1
+        print(f"--- [LLM RETRY] status={_status_code(error)} attempt={attempt + 1} wait={delay:.1f}s ---")
+        return delay
+
+    def run(self, call, tokens):
+        """Runs call() under the scheduler, retrying 429/5xx errors with jittered backoff"""
+        attempt = 0
+        while True:
+            entry = self.acquire(tokens)
+            actual = None
+            try:
+                result = call()
+                usage = getattr(result, "usage_metadata", None) or {}
+                actual = usage.get("total_tokens")
+                annotate(**{"llm.retries": attempt})
+                return result
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            finally:
+                self.release(entry, actual)
+            time.sleep(delay)
+            attempt += 1
+
+    def run_stream(self, start_stream, tokens):
+        """Yields chunks from start_stream() under the scheduler; retries only before the first chunk"""
+        attempt = 0
+        while True:
+            entry = self.acquire(tokens)
+            actual = None
+            started = False
+            try:
+                for chunk in start_stream():
+                    started = True
+                    usage = getattr(chunk, "usage_metadata", None) or {}
+                    actual = usage.get("total_tokens") or actual
+                    yield chunk
+                annotate(**{"llm.retries": attempt})
+                return
+            except Exception as e:
+                delay = self._retry_delay(attempt, e, started)
+                if delay is None:
+                    raise
+            finally:
+                self.release(entry, actual)
+            time.sleep(delay)
+            attempt += 1
+
+    async def _aacquire(self, tokens):
+        """acquire() for event-loop callers: waits on a future woken by _notify(), holding no thread
+
+        Admission happens synchronously under the lock, so a cancelled waiter
+        only has to leave the queue.
+        """
+        session = current_session.get()
+        ticket = _AsyncTicket(asyncio.get_running_loop())
+        enqueued = time.monotonic()
+        with self._cond:
+            self._queues.setdefault(session, deque()).append(ticket)
+            self._async_waiters.add(ticket)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._admission_wait(session, ticket, tokens)
+                    if wait is not None and wait <= 0:
+                        self._async_waiters.discard(ticket)
+                        return self._admit(session, tokens, enqueued)
+                    woken = ticket.arm()  # Before unlocking, so no wake-up is missed
+                await asyncio.wait({woken}, timeout=wait)
+        except BaseException:
+            with self._cond:
+                self._async_waiters.discard(ticket)
+                queue = self._queues.get(session)
+                if queue and ticket in queue:
+                    queue.remove(ticket)
+                    if not queue:
+                        del self._queues[session]
+                    self._notify()
+            raise
+
+    async def arun(self, acall, tokens):
+        """Async run(): awaits acall() under the scheduler with the same retry policy"""
+        attempt = 0
+        while True:
+            entry = await self._aacquire(tokens)
+            actual = None
+            try:
+                result = await acall()
+                usage = getattr(result, "usage_metadata", None) or {}
+                actual = usage.get("total_tokens")
+                annotate(**{"llm.retries": attempt})
+                return result
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            finally:
+                self.release(entry, actual)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def arun_stream(self, start_stream, tokens):
+        """Async run_stream(): yields chunks from the async iterator start_stream() returns"""
+        attempt = 0
+        while True:
+            entry = await self._aacquire(tokens)
+            actual = None
+            started = False
+            try:
+                async for chunk in start_stream():
+                    started = True
+                    usage = getattr(chunk, "usage_metadata", None) or {}
+                    actual = usage.get("total_tokens") or actual
+                    yield chunk
+                annotate(**{"llm.retries": attempt})
+                return
+            except Exception as e:
+                delay = self._retry_delay(attempt, e, started)
+                if delay is None:
+                    raise
+            finally:
+                self.release(entry, actual)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def metrics(self):
+        """Returns queue depth, in-flight count, budget usage and wait-time statistics"""
+        with self._cond:
+            now = time.monotonic()
+            self._prune(now)
+            waits = sorted(self._recent_waits)
+            return {
+                "queue_depth": sum(len(q) for q in self._queues.values()),
+                "queued_sessions": len(self._queues),
+                "in_flight": self._in_flight,
+                "requests_last_minute": len(self._requests),
+                "tokens_last_minute": sum(entry[1] for entry in self._tokens),
+                "tokens_total": self._tokens_total,
+                "admitted": self._admitted,
+                "retries": self._retries,
+                "failures": self._failures,
+                "wait_avg_s": round(self._wait_total / self._admitted, 3) if self._admitted else 0.0,
+                "wait_p95_s": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0,
+                "wait_max_s": round(self._wait_max, 3),
+            }
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """Returns the process-wide scheduler configured from environment variables"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler(
+                    requests_per_minute=int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30")),
+                    tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", "6000")),
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+                    max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+                )
+    return _scheduler
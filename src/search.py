@@ -0,0 +1,181 @@
+"""Web Search - DuckDuckGo search behind a persistent SQLite result cache"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from src.persistence import connect
+from src.telemetry import annotate, span
+
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "./cache/search_cache.db")
+
+def normalize_query(query):
+    """Normalizes a query so trivially different spellings share a cache entry"""
+    return " ".join(query.lower().split())
+
+def _ddgs_search(query, max_results):
+    """Runs a live DuckDuckGo text search"""
+    from ddgs import DDGS
+
+    with DDGS() as ddgs:
+        return [r for r in ddgs.text(query, max_results=max_results)]
+
+class SearchCache:
+    """SQLite-backed search cache with TTL, LRU eviction and stale-while-revalidate"""
+
+    def __init__(self, path=SEARCH_CACHE_PATH, ttl=None, stale_ttl=None, max_entries=None):
+        self.path = path
+        self.ttl = float(os.getenv("SEARCH_CACHE_TTL", "86400")) if ttl is None else ttl
+        self.stale_ttl = float(os.getenv("SEARCH_CACHE_STALE_TTL", "604800")) if stale_ttl is None else stale_ttl
+        self.max_entries = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000")) if max_entries is None else max_entries
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "errors": 0,
+                      "stale_on_error": 0, "revalidations": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._revalidating = set()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with connect(self.path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_results (
+                    key TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    max_results INTEGER NOT NULL,
+                    results TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_search_last_access ON search_results(last_access)")
+
+    @staticmethod
+    def make_key(query, max_results):
+        """Cache key from the normalized query and result count"""
+        raw = f"{normalize_query(query)}|{max_results}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns (results, age_seconds) for a cached entry, or None"""
+        with self._lock, connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT results, fetched_at FROM search_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            conn.execute("UPDATE search_results SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(row[0]), now - row[1]
+
+    def put(self, key, query, max_results, results):
+        """Stores results and evicts least recently used entries beyond max_entries"""
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?, ?, ?)",
+                (key, normalize_query(query), max_results, json.dumps(results), now, now)
+            )
+            count = conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM search_results WHERE key IN "
+                    "(SELECT key FROM search_results ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.stats["evictions"] += overflow
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _revalidate(self, key, query, max_results, fetch):
+        """Refreshes a stale entry in the background (one refresh per key at a time)"""
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def refresh():
+            try:
+                results = fetch(query, max_results)
+                if results:  # An empty response never replaces real results
+                    self.put(key, query, max_results, results)
+                self._count("revalidations")
+            except Exception as e:
+                print(f"Search revalidation error: {e}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def search(self, query, max_results, fetch=_ddgs_search, refresh=False):
+        """Returns search results, serving fresh or stale cache entries before hitting the network
+
+        refresh=True always fetches live (a cached copy is only used if the
+        fetch fails). Empty result lists are returned but never cached.
+        """
+        key = self.make_key(query, max_results)
+        cached = self.get(key)
+        if cached is not None and not refresh:
+            results, age = cached
+            if age <= self.ttl:
+                self._count("hits")
+                annotate(**{"search.cache": "hit"})
+                return results
+            if age <= self.ttl + self.stale_ttl:
+                self._count("stale_hits")
+                annotate(**{"search.cache": "stale"})
+                self._revalidate(key, query, max_results, fetch)
+                return results
+
+        self._count("misses")
+        annotate(**{"search.cache": "miss"})
+        try:
+            results = fetch(query, max_results)
+        except Exception:
+            self._count("errors")
+            if cached is not None:
+                # Any cached copy beats failing the gather
+                self._count("stale_on_error")
+                annotate(**{"search.cache": "stale_on_error"})
+                print("--- [SEARCH] Live search failed, serving stale cached results ---")
+                return cached[0]
+            raise
+        if results:
+            self.put(key, query, max_results, results)
+        return results
+
+    def cache_stats(self):
+        """Returns hit/miss counters plus the current entry count"""
+        with self._lock, connect(self.path) as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0]
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["entries"] = entries
+        stats["hit_rate"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_search_cache():
+    """Returns the process-wide search cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SearchCache()
+    return _cache
+
+def web_search(query, max_results=8, refresh=False):
+    """Cached DuckDuckGo text search returning result dicts (title, href, body); refresh bypasses the cache"""
+    with span("search.web", kind="search", **{"search.query": query, "search.max_results": max_results}) as current:
+        results = get_search_cache().search(query, max_results, refresh=refresh)
+        current.set_attribute("search.results", len(results))
+        return results
+
+async def aweb_search(query, max_results=8, refresh=False):
+    """web_search() offloaded to a worker thread (DDGS and SQLite are blocking)"""
+    return await asyncio.to_thread(web_search, query, max_results, refresh)
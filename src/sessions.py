@@ -0,0 +1,77 @@
+"""Learner Sessions - Persists each learner's path and position so progress survives restarts
+
+Per-checkpoint workflow state lives in the graph's SQLite checkpointer
+(see src/graph.py); this table only records which path a session is on.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from src.graph import GRAPH_CHECKPOINT_PATH
+from src.persistence import connect
+
+class SessionStore:
+    """SQLite table of session_id -> (topic, checkpoints, path_id, checkpoint_idx)"""
+
+    def __init__(self, path=GRAPH_CHECKPOINT_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with connect(self.path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS learner_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    topic TEXT NOT NULL,
+                    checkpoints TEXT NOT NULL,
+                    path_id TEXT NOT NULL,
+                    checkpoint_idx INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def load(self, session_id):
+        """Returns the session's saved path as a dict, or None"""
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT topic, checkpoints, path_id, checkpoint_idx FROM learner_sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"topic": row[0], "checkpoints": json.loads(row[1]), "path_id": row[2], "checkpoint_idx": row[3]}
+
+    def start_path(self, session_id, topic, checkpoints):
+        """Records a new learning path for the session and returns its path_id"""
+        path_id = uuid.uuid4().hex[:12]
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO learner_sessions VALUES (?, ?, ?, ?, 0, ?)",
+                (session_id, topic, json.dumps(checkpoints), path_id, time.time())
+            )
+        return path_id
+
+    def set_checkpoint(self, session_id, checkpoint_idx):
+        """Moves the session to another checkpoint of its current path"""
+        with connect(self.path) as conn:
+            conn.execute(
+                "UPDATE learner_sessions SET checkpoint_idx = ?, updated_at = ? WHERE session_id = ?",
+                (checkpoint_idx, time.time(), session_id)
+            )
+
+    def clear(self, session_id):
+        """Forgets the session's path (its checkpoint threads are left for cleanup)"""
+        with connect(self.path) as conn:
+            conn.execute("DELETE FROM learner_sessions WHERE session_id = ?", (session_id,))
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_session_store():
+    """Returns the process-wide session store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore()
+    return _store
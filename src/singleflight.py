@@ -0,0 +1,136 @@
+"""Single-Flight - Coalesces identical in-flight gather and generation work across sessions
+
+When many learners reach the same checkpoint at once, the first request for
+a key runs the work and concurrent identical requests wait for its result
+instead of repeating the search, embedding and LLM calls. Keys are
+(node, topic, objectives, ...), so different checkpoints never share or
+block on each other's work.
+"""
+import asyncio
+import copy
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+from src.curriculum_store import normalize_topic
+from src.persistence import enabled
+from src.telemetry import annotate
+
+_flight = None
+_flight_lock = threading.Lock()
+
+def flight_key(node, topic, objectives="", *extra):
+    """Coalescing key; topic and objectives are normalized like curriculum store keys"""
+    return (node, normalize_topic(topic), normalize_topic(objectives), *extra)
+
+class _Call:
+    """One in-flight computation and the callers waiting on it"""
+
+    def __init__(self):
+        self.future = Future()
+        self.followers = 0
+        self.started = time.perf_counter()
+
+class SingleFlight:
+    """Per-key in-flight registry shared by sync (thread) and async callers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call
+        self._stats = {}  # node -> {"executions", "coalesced", "failures", "saved_s"}
+
+    def _join(self, key):
+        """Returns (call, is_leader) for key, registering a new call if none is in flight"""
+        with self._lock:
+            stats = self._stats.setdefault(key[0], {"executions": 0, "coalesced": 0, "failures": 0, "saved_s": 0.0})
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                stats["coalesced"] += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            stats["executions"] += 1
+            return call, True
+
+    def _land(self, key, call, result=None, error=None):
+        """Publishes the leader's outcome; a cancelled leader lets followers retry on their own"""
+        with self._lock:
+            del self._calls[key]
+            stats = self._stats[key[0]]
+            if error is None:
+                stats["saved_s"] += call.followers * (time.perf_counter() - call.started)
+            elif isinstance(error, Exception):
+                stats["failures"] += 1
+        if error is None:
+            call.future.set_result(result)
+        elif isinstance(error, Exception):
+            call.future.set_exception(error)
+        else:
+            call.future.cancel()
+
+    @staticmethod
+    def _followed(key):
+        print(f"--- [SINGLE-FLIGHT] Joined in-flight {key[0]} for {key[1]} ---")
+        annotate(**{"singleflight.coalesced": True, "singleflight.node": key[0]})
+
+    def do(self, key, fn):
+        """Runs fn() unless an identical call is in flight, in which case waits for and shares its result"""
+        call, leader = self._join(key)
+        if not leader:
+            self._followed(key)
+            try:
+                return copy.deepcopy(call.future.result())
+            except CancelledError:
+                return self.do(key, fn)
+        try:
+            result = fn()
+        except BaseException as e:
+            self._land(key, call, error=e)
+            raise
+        self._land(key, call, result)
+        return result
+
+    async def ado(self, key, afn):
+        """Async do(): afn is a coroutine function; waiting never blocks the event loop"""
+        call, leader = self._join(key)
+        if not leader:
+            self._followed(key)
+            try:
+                return copy.deepcopy(await asyncio.wrap_future(call.future))
+            except asyncio.CancelledError:
+                if not call.future.cancelled():
+                    raise  # This caller was cancelled, not the leader
+                return await self.ado(key, afn)
+        try:
+            result = await afn()
+        except BaseException as e:
+            self._land(key, call, error=e)
+            raise
+        self._land(key, call, result)
+        return result
+
+    def flight_stats(self):
+        """Per-node executions, coalesced callers, failures and leader seconds saved, plus keys in flight"""
+        with self._lock:
+            nodes = {node: {**stats, "saved_s": round(stats["saved_s"], 3)} for node, stats in self._stats.items()}
+            return {"in_flight": len(self._calls), "nodes": nodes}
+
+def get_single_flight():
+    """Returns the process-wide single-flight registry (None when disabled via SINGLE_FLIGHT_ENABLED)"""
+    global _flight
+    if not enabled("SINGLE_FLIGHT_ENABLED"):
+        return None
+    if _flight is None:
+        with _flight_lock:
+            if _flight is None:
+                _flight = SingleFlight()
+    return _flight
+
+def coalesce(key, fn):
+    """fn() through the shared registry, or directly when single-flight is disabled"""
+    flight = get_single_flight()
+    return flight.do(key, fn) if flight else fn()
+
+async def acoalesce(key, afn):
+    """Async coalesce()"""
+    flight = get_single_flight()
+    return await (flight.ado(key, afn) if flight else afn())
@@ -10,4 +10,27 @@ class LearningState(TypedDict):
     questions: List[str]          # Generated MCQs or Feynman content
     learner_answers: str          # User's answers (e.g., "1.A, 2.B, 3.C")
     understanding_score: int      # Assessment score (0-100)
-    search_retry_count: int       # Number of context gathering retries  
\ No newline at end of file
+    search_retry_count: int       # Number of context gathering retries
+    answer_key: List[str]         # Hidden correct letters, one per question
+    question_results: List[dict]  # Per-question grading of the last submission
+    material_cached: bool         # Study material came from the curriculum store (already validated)
+    context_degraded: bool        # Study material was written by the offline fallback model (never stored)
+    seen_questions: List[str]     # Fingerprints of questions already shown to this learner
+
+def initial_state(topic, objectives):
+    """Returns a fresh workflow state for one checkpoint"""
+    return {
+        "topic": topic,
+        "objectives": objectives,
+        "gathered_context": "",
+        "relevance_score": 0,
+        "questions": [],
+        "learner_answers": "",
+        "understanding_score": 0,
+        "search_retry_count": 0,
+        "answer_key": [],
+        "question_results": [],
+        "material_cached": False,
+        "context_degraded": False,
+        "seen_questions": []
+    }
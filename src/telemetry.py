@@ -0,0 +1,176 @@
+"""Telemetry - OpenTelemetry spans and latency histograms for nodes, LLM calls, search and RAG
+
+Configured with OTEL_EXPORTER:
+    none     (default) spans and metrics are no-ops
+    console  print spans and metrics to stdout
+    file     append JSON spans/metrics to OTEL_FILE_PATH (default ./telemetry/)
+    otlp     send to an OTLP collector (OTEL_EXPORTER_OTLP_ENDPOINT etc.)
+"""
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import metrics, trace
+except ImportError:  # Telemetry is optional
+    metrics = trace = None
+
+_lock = threading.Lock()
+_initialized = False
+_tracer = None
+_histograms = {}
+
+HISTOGRAMS = {
+    "node": ("alearn.node.duration", "Graph node latency"),
+    "llm": ("alearn.llm.duration", "LLM call latency"),
+    "search": ("alearn.search.duration", "Web search latency"),
+    "rag": ("alearn.rag.duration", "RAG operation latency"),
+}
+
+def _build_exporters(kind):
+    """Returns (span_exporter, metric_exporter) for the configured exporter kind"""
+    from opentelemetry.sdk.metrics.export import ConsoleMetricExporter
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if kind == "console":
+        return ConsoleSpanExporter(), ConsoleMetricExporter()
+    if kind == "file":
+        directory = os.getenv("OTEL_FILE_PATH", "./telemetry")
+        os.makedirs(directory, exist_ok=True)
+        span_out = open(os.path.join(directory, "spans.jsonl"), "a", buffering=1)
+        metric_out = open(os.path.join(directory, "metrics.jsonl"), "a", buffering=1)
+        return (
+            ConsoleSpanExporter(out=span_out, formatter=lambda span: span.to_json(indent=None) + "\n"),
+            ConsoleMetricExporter(out=metric_out, formatter=lambda data: data.to_json(indent=None) + "\n"),
+        )
+    if kind == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(), OTLPMetricExporter()
+    raise ValueError(f"Unknown OTEL_EXPORTER: {kind}")
+
+def _init():
+    """Sets up tracer and meter providers once, based on OTEL_EXPORTER"""
+    global _initialized, _tracer
+    if _initialized:
+        return
+    with _lock:
+        if _initialized:
+            return
+        kind = os.getenv("OTEL_EXPORTER", "none").lower()
+        if trace is not None and kind != "none":
+            try:
+                from opentelemetry.sdk.metrics import MeterProvider
+                from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+                span_exporter, metric_exporter = _build_exporters(kind)
+                resource = Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", "autonomous-learning-agent")})
+
+                tracer_provider = TracerProvider(resource=resource)
+                tracer_provider.add_span_processor(BatchSpanProcessor(span_exporter))
+                trace.set_tracer_provider(tracer_provider)
+
+                reader = PeriodicExportingMetricReader(
+                    metric_exporter,
+                    export_interval_millis=int(os.getenv("OTEL_METRIC_EXPORT_INTERVAL", "60000"))
+                )
+                metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=[reader]))
+
+                _tracer = trace.get_tracer("src.telemetry")
+                meter = metrics.get_meter("src.telemetry")
+                for key, (name, description) in HISTOGRAMS.items():
+                    _histograms[key] = meter.create_histogram(name, unit="ms", description=description)
+                print(f"--- [TELEMETRY] Exporting spans and metrics via {kind} ---")
+            except Exception as e:
+                print(f"Warning: Telemetry disabled: {e}")
+        _initialized = True
+
+class _NoopSpan:
+    """Stands in for a span when telemetry is disabled"""
+
+    def set_attribute(self, key, value):
+        pass
+
+def _clean(value):
+    """Coerces attribute values to OpenTelemetry-compatible types"""
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+@contextmanager
+def span(name, kind=None, **attributes):
+    """Traces a block as a span; if kind names a histogram, also records its latency in ms"""
+    _init()
+    start = time.perf_counter()
+    if _tracer is None:
+        yield _NoopSpan()
+        return
+    with _tracer.start_as_current_span(name) as current:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, _clean(value))
+        try:
+            yield current
+        finally:
+            histogram = _histograms.get(kind)
+            if histogram is not None:
+                labels = {"operation": name}
+                histogram.record((time.perf_counter() - start) * 1000, labels)
+
+def annotate(**attributes):
+    """Adds attributes to the current span, if any"""
+    if trace is None or _tracer is None:
+        return
+    current = trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, _clean(value))
+
+def traced(name, kind=None):
+    """Decorator that runs a function inside a span (use annotate() within it to add attributes)"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, kind=kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _node_span(name, state):
+    return span(
+        f"node.{name}", kind="node",
+        topic=state.get("topic"),
+        context_chars=len(state.get("gathered_context") or ""),
+        search_retry_count=state.get("search_retry_count", 0)
+    )
+
+def _record_result(current, update):
+    if isinstance(update, dict):
+        for key in ("relevance_score", "understanding_score"):
+            if key in update:
+                current.set_attribute(f"result.{key}", _clean(update[key]))
+
+def traced_node(name, node_fn):
+    """Wraps a graph node in a span carrying topic, context size and retry count"""
+    @functools.wraps(node_fn)
+    def wrapper(state):
+        with _node_span(name, state) as current:
+            update = node_fn(state)
+            _record_result(current, update)
+            return update
+    return wrapper
+
+def traced_anode(name, node_fn):
+    """traced_node() for async nodes"""
+    @functools.wraps(node_fn)
+    async def wrapper(state):
+        with _node_span(name, state) as current:
+            update = await node_fn(state)
+            _record_result(current, update)
+            return update
+    return wrapper
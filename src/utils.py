@@ -1,25 +1,379 @@
-"""LLM Utility - Provides configured Groq LLM instance"""
+"""LLM Utility - Provides configured Groq LLM instance, routed per node"""
+import contextvars
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
+from src.llm_cache import get_llm_cache, make_cache_key
+from src.llm_router import LLM_LOCAL_FALLBACK, LLM_MODEL, LLM_PROVIDER, get_profile, is_unreachable
+from src.local_llm import LOCAL_MODEL, get_local_llm
+from src.scheduler import estimate_tokens, get_scheduler
+from src.telemetry import span
 
 load_dotenv()
 
-def get_llm():
-    """Returns configured Groq LLM instance with error handling"""
+# Output tokens reserved against the TPM budget before the real usage is known
+COMPLETION_TOKEN_RESERVE = 512
+
+_client = None
+_client_lock = threading.Lock()
+
+# Optional token-delta sink for nodes called outside a streaming graph run
+_local_writer = contextvars.ContextVar("stream_writer", default=None)
+
+# Tracker noting calls answered by the offline fallback in the current node (see track_fallback)
+_fallback_tracker = contextvars.ContextVar("llm_fallback_tracker", default=None)
+
+_ttft_lock = threading.Lock()
+_ttft_stats = {}  # node -> {"count", "total_s", "last_s"}
+
+class ScheduledLLM:
+    """Thin wrapper that serves cached responses and routes other calls on a shared client through the LLM scheduler
+
+    params (model, max_tokens, timeout from the node's profile) are passed
+    with every call. When the provider is unreachable and a fallback model is
+    given, the call is answered by the fallback instead of failing.
+    """
+
+    def __init__(self, client, scheduler=None, cache=None, params=None, fallback=None):
+        self.client = client
+        self.scheduler = scheduler
+        self.cache = cache
+        self.params = params or {}
+        self.fallback = fallback
+
+    @property
+    def model(self):
+        return self.params.get("model") or self.client.model_name
+
+    def _cache_key(self, prompt, kwargs):
+        """Key over model, generation parameters and prompt"""
+        params = {"temperature": self.client.temperature, **kwargs}
+        params.pop("timeout", None)  # Does not change the completion
+        return make_cache_key(self.model, params, prompt)
+
+    def _span(self, name, prompt):
+        """Opens an LLM span with model and prompt-size attributes"""
+        return span(name, kind="llm", **{
+            "gen_ai.request.model": self.model,
+            "gen_ai.request.max_tokens": self.params.get("max_tokens"),
+            "llm.prompt_chars": len(str(prompt)),
+            "llm.cache_enabled": self.cache is not None
+        })
+
+    def _tokens(self, prompt):
+        """Budget reserved before the call: the prompt plus at most the completion cap"""
+        return estimate_tokens(prompt) + min(COMPLETION_TOKEN_RESERVE, self.params.get("max_tokens") or COMPLETION_TOKEN_RESERVE)
+
+    def _cached(self, key, current):
+        """Looks up a cached completion, recording the hit/miss on the span"""
+        if not key:
+            return None
+        content = self.cache.get(key)
+        current.set_attribute("llm.cache_hit", content is not None)
+        return content
+
+    def _finish(self, current, key, prompt, text, usage):
+        """Records token usage on the span and caches the completion"""
+        current.set_attribute("gen_ai.usage.input_tokens", usage.get("input_tokens") or estimate_tokens(prompt))
+        current.set_attribute("gen_ai.usage.output_tokens", usage.get("output_tokens") or estimate_tokens(text))
+        if key:
+            self.cache.put(key, text)
+
+    def _degrade(self, error, current):
+        """True if the call should be answered by the fallback model (never cached)"""
+        if self.fallback is None or not is_unreachable(error):
+            return False
+        print(f"--- [LLM FALLBACK] {self.model} unreachable ({type(error).__name__}), answering locally ---")
+        current.set_attribute("llm.fallback", True)
+        tracker = _fallback_tracker.get()
+        if tracker is not None:
+            tracker.used = True
+        return True
+
+    @staticmethod
+    def _fallback_message(response):
+        """Marks a fallback answer so callers keep it out of the curriculum store and question bank"""
+        response.response_metadata["fallback"] = True
+        return response
+
+    @staticmethod
+    def _cached_message(content):
+        from langchain_core.messages import AIMessage
+        return AIMessage(content=content, response_metadata={"cache_hit": True})
+
+    def invoke(self, prompt, **kwargs):
+        """Invokes the model once the scheduler admits the call, unless the response is cached"""
+        with self._span("llm.invoke", prompt) as current:
+            kwargs = {**self.params, **kwargs}
+            key = self._cache_key(prompt, kwargs) if self.cache else None
+            content = self._cached(key, current)
+            if content is not None:
+                return self._cached_message(content)
+
+            call = lambda: self.client.invoke(prompt, **kwargs)
+            try:
+                response = self.scheduler.run(call, self._tokens(prompt)) if self.scheduler else call()
+            except Exception as e:
+                if not self._degrade(e, current):
+                    raise
+                return self._fallback_message(self.fallback.invoke(prompt))
+            self._finish(current, key, prompt, response.content, getattr(response, "usage_metadata", None) or {})
+            return response
+
+    async def ainvoke(self, prompt, **kwargs):
+        """Async invoke(): awaits the client's ainvoke without blocking the event loop"""
+        with self._span("llm.ainvoke", prompt) as current:
+            kwargs = {**self.params, **kwargs}
+            key = self._cache_key(prompt, kwargs) if self.cache else None
+            content = self._cached(key, current)
+            if content is not None:
+                return self._cached_message(content)
+
+            acall = lambda: self.client.ainvoke(prompt, **kwargs)
+            try:
+                response = await (self.scheduler.arun(acall, self._tokens(prompt)) if self.scheduler else acall())
+            except Exception as e:
+                if not self._degrade(e, current):
+                    raise
+                return self._fallback_message(await self.fallback.ainvoke(prompt))
+            self._finish(current, key, prompt, response.content, getattr(response, "usage_metadata", None) or {})
+            return response
+
+    def stream(self, prompt, **kwargs):
+        """Yields content deltas as they arrive; cached responses are yielded in one piece"""
+        with self._span("llm.stream", prompt) as current:
+            kwargs = {**self.params, **kwargs}
+            key = self._cache_key(prompt, kwargs) if self.cache else None
+            content = self._cached(key, current)
+            if content is not None:
+                yield content
+                return
+
+            start_stream = lambda: self.client.stream(prompt, **kwargs)
+            parts = []
+            usage = {}
+            try:
+                chunks = self.scheduler.run_stream(start_stream, self._tokens(prompt)) if self.scheduler else start_stream()
+                for chunk in chunks:
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield chunk.content
+            except Exception as e:
+                # Only an unstarted stream can switch models without garbling the output
+                if parts or not self._degrade(e, current):
+                    raise
+                for chunk in self.fallback.stream(prompt):
+                    if chunk.content:
+                        yield chunk.content
+                return
+            self._finish(current, key, prompt, "".join(parts), usage)
+
+    async def astream(self, prompt, **kwargs):
+        """Async stream(): yields content deltas from the client's astream"""
+        with self._span("llm.astream", prompt) as current:
+            kwargs = {**self.params, **kwargs}
+            key = self._cache_key(prompt, kwargs) if self.cache else None
+            content = self._cached(key, current)
+            if content is not None:
+                yield content
+                return
+
+            start_stream = lambda: self.client.astream(prompt, **kwargs)
+            parts = []
+            usage = {}
+            try:
+                chunks = self.scheduler.arun_stream(start_stream, self._tokens(prompt)) if self.scheduler else start_stream()
+                async for chunk in chunks:
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield chunk.content
+            except Exception as e:
+                if parts or not self._degrade(e, current):
+                    raise
+                async for chunk in self.fallback.astream(prompt):
+                    if chunk.content:
+                        yield chunk.content
+                return
+            self._finish(current, key, prompt, "".join(parts), usage)
+
+def _create_client(api_key):
+    """Builds the long-lived Groq client with a keep-alive HTTP connection pool
+
+    Model, max_tokens and timeout are set per call from the node's profile.
+    """
+    import httpx
+    from langchain_groq import ChatGroq
+
+    pool_size = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    limits = httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=120
+    )
+    # Sync calls (prefetch, batch) and async calls (the app's astream/ainvoke) get the same pool settings
+    return ChatGroq(
+        model=LLM_MODEL,
+        temperature=0,
+        groq_api_key=api_key,
+        max_retries=0,  # Retries are handled by the scheduler
+        http_client=httpx.Client(limits=limits, timeout=60),
+        http_async_client=httpx.AsyncClient(limits=limits, timeout=60)
+    )
+
+def model_name(node=None):
+    """Name of the model generating a node's content"""
+    if LLM_PROVIDER == "local":
+        return LOCAL_MODEL
+    return get_profile(node)["model"]
+
+def get_llm(cache=True, node=None):
+    """Returns the LLM for a node, routed by provider and the node's profile
+
+    Pass cache=False for nodes whose output should always be freshly generated.
+    Responses are only cached for deterministic (temperature=0) settings.
+    With LLM_PROVIDER=local, a deterministic offline model answers every call.
+    """
+    global _client
+    if LLM_PROVIDER == "local":
+        return ScheduledLLM(get_local_llm())
+
     api_key = os.getenv("GROQ_API_KEY")
-    
+
     # Validate API key
     if not api_key:
         raise ValueError("GROQ_API_KEY not found in environment variables")
     if not api_key.startswith("gsk_"):
         raise ValueError("Invalid GROQ_API_KEY format. Should start with 'gsk_'")
-    
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                try:
+                    _client = _create_client(api_key)
+                except Exception as e:
+                    raise ValueError(f"Failed to initialize Groq LLM: {str(e)}")
+    # ChatGroq stores temperature=0 as a tiny epsilon
+    use_cache = cache and (_client.temperature or 0) < 1e-6
+    return ScheduledLLM(
+        _client, get_scheduler(), get_llm_cache() if use_cache else None,
+        params=dict(get_profile(node)),
+        fallback=get_local_llm() if LLM_LOCAL_FALLBACK else None
+    )
+
+class FallbackTracker:
+    """Set by track_fallback(): used is True once any LLM call was answered by the offline fallback"""
+
+    def __init__(self):
+        self.used = False
+
+@contextmanager
+def track_fallback():
+    """Notes whether LLM calls in the block (including streamed ones) were answered by the fallback
+
+    Fallback output must not be persisted as if the routed model wrote it.
+    """
+    tracker = FallbackTracker()
+    token = _fallback_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _fallback_tracker.reset(token)
+
+@contextmanager
+def stream_to(writer):
+    """Routes token deltas from stream_llm() to writer for nodes called directly (not via the graph)"""
+    token = _local_writer.set(writer)
     try:
-        return ChatGroq(
-            model="llama-3.1-8b-instant",
-            temperature=0,
-            groq_api_key=api_key
-        )
-    except Exception as e:
-        raise ValueError(f"Failed to initialize Groq LLM: {str(e)}")
\ No newline at end of file
+        yield
+    finally:
+        _local_writer.reset(token)
+
+def _stream_writer():
+    """Returns the active delta writer: a local sink, the graph's custom stream, or None"""
+    writer = _local_writer.get()
+    if writer is not None:
+        return writer
+    try:
+        from langgraph.config import get_stream_writer
+        return get_stream_writer()
+    except RuntimeError:
+        return None  # Not running inside a graph
+
+def _record_ttft(node, seconds):
+    """Tracks time to first token per node"""
+    with _ttft_lock:
+        stats = _ttft_stats.setdefault(node, {"count": 0, "total_s": 0.0, "last_s": 0.0})
+        stats["count"] += 1
+        stats["total_s"] += seconds
+        stats["last_s"] = seconds
+    print(f"--- [TTFT] {node}: {seconds:.2f}s ---")
+
+def ttft_stats():
+    """Returns last and average time to first token per node"""
+    with _ttft_lock:
+        return {
+            node: {"last_s": round(s["last_s"], 3), "avg_s": round(s["total_s"] / s["count"], 3), "count": s["count"]}
+            for node, s in _ttft_stats.items()
+        }
+
+class _DeltaEmitter:
+    """Forwards streamed deltas to a writer, withholding lines that match hidden_lines"""
+
+    def __init__(self, writer, node, hidden_lines):
+        self.writer = writer
+        self.node = node
+        self.hidden_lines = hidden_lines
+        self.start = time.perf_counter()
+        self.parts = []
+        self.pending = ""
+
+    def feed(self, delta):
+        if not self.parts:
+            _record_ttft(self.node, time.perf_counter() - self.start)
+        self.parts.append(delta)
+        if self.hidden_lines is None:
+            self.writer({"node": self.node, "delta": delta})
+            return
+        # Emit complete lines only, so hidden lines never leak partially
+        self.pending += delta
+        *lines, self.pending = self.pending.split("\n")
+        visible = "".join(line + "\n" for line in lines if not self.hidden_lines.match(line))
+        if visible:
+            self.writer({"node": self.node, "delta": visible})
+
+    def close(self):
+        """Flushes the last partial line and returns the full text"""
+        if self.pending and self.hidden_lines is not None and not self.hidden_lines.match(self.pending):
+            self.writer({"node": self.node, "delta": self.pending})
+        return "".join(self.parts)
+
+def stream_llm(llm, prompt, node, hidden_lines=None):
+    """Generates a completion, emitting {"node", "delta"} events as tokens arrive
+
+    Lines matching the hidden_lines regex are withheld from the emitted
+    deltas (but kept in the returned text). Falls back to a blocking
+    invoke when no stream consumer is active.
+    """
+    writer = _stream_writer()
+    if writer is None:
+        return llm.invoke(prompt).content
+
+    emitter = _DeltaEmitter(writer, node, hidden_lines)
+    for delta in llm.stream(prompt):
+        emitter.feed(delta)
+    return emitter.close()
+
+async def astream_llm(llm, prompt, node, hidden_lines=None):
+    """Async stream_llm(): emits deltas from llm.astream, or awaits ainvoke when nothing is listening"""
+    writer = _stream_writer()
+    if writer is None:
+        return (await llm.ainvoke(prompt)).content
+
+    emitter = _DeltaEmitter(writer, node, hidden_lines)
+    async for delta in llm.astream(prompt):
+        emitter.feed(delta)
+    return emitter.close()
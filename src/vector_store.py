@@ -0,0 +1,223 @@
+"""Vector Stores - Pluggable backends behind RAGManager: an in-memory NumPy index or persistent Chroma
+
+Both backends store chunk vectors with their text, a source URL and a
+last_seen timestamp, and answer batched top-k queries filtered by recency
+and source. The memory backend suits the short-lived corpora of a single
+gather; Chroma keeps a topic's corpus across sessions and restarts.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from src.chroma_gc import record_access
+from src.coverage import normalize_rows
+from src.resources import get_chroma_client
+
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+MEMORY_MAX_COLLECTIONS = int(os.getenv("VECTOR_MEMORY_MAX_COLLECTIONS", "64"))
+
+_memory_stores = OrderedDict()  # name -> MemoryStore, least recently used first
+_memory_lock = threading.Lock()
+
+class ChromaStore:
+    """Persistent Chroma collection, for corpora that should outlive the process"""
+
+    backend = "chroma"
+
+    def __init__(self, name, embedding_fn):
+        # Client is shared process-wide (see src/resources.py)
+        self.client = get_chroma_client()
+        self.embedding_fn = embedding_fn
+        self.collection = self.client.get_or_create_collection(name=name, embedding_function=embedding_fn)
+        # Feeds the LRU policy of the background collector (see src/chroma_gc.py)
+        record_access(self.collection)
+
+    @property
+    def name(self):
+        return self.collection.name
+
+    def count(self):
+        return self.collection.count()
+
+    def existing_ids(self, ids):
+        return set(self.collection.get(ids=ids, include=[])["ids"])
+
+    def touch(self, ids, now):
+        """Refreshes last_seen without re-embedding"""
+        self.collection.update(ids=ids, metadatas=[{"last_seen": now} for _ in ids])
+
+    def add(self, ids, documents, embeddings, sources, now):
+        self.collection.add(
+            ids=ids,
+            documents=documents,
+            embeddings=embeddings,
+            metadatas=[{"source": source or "", "added_at": now, "last_seen": now} for source in sources]
+        )
+
+    @staticmethod
+    def _where(max_age_seconds=None, sources=None):
+        """Builds a Chroma metadata filter for recency and source"""
+        filters = []
+        if max_age_seconds is not None:
+            filters.append({"last_seen": {"$gte": time.time() - max_age_seconds}})
+        if sources:
+            filters.append({"source": {"$in": list(sources)}})
+        where = None
+        if len(filters) == 1:
+            where = filters[0]
+        elif filters:
+            where = {"$and": filters}
+        return where
+
+    def query(self, query_embeddings, n_results, max_age_seconds=None, sources=None):
+        """Returns (documents, embeddings), one list per query"""
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=self._where(max_age_seconds, sources),
+            include=["documents", "embeddings"]
+        )
+        return results["documents"], results["embeddings"]
+
+    def clear(self):
+        name = self.collection.name
+        self.client.delete_collection(name)
+        self.collection = self.client.get_or_create_collection(name=name, embedding_function=self.embedding_fn)
+
+    def drop(self):
+        self.client.delete_collection(self.collection.name)
+
+class MemoryStore:
+    """Array-backed index in process memory: one contiguous float32 matrix of unit vectors, no disk I/O"""
+
+    backend = "memory"
+
+    def __init__(self, name, capacity=256):
+        self.name = name
+        self._lock = threading.Lock()
+        self._capacity = capacity
+        self._vectors = None  # (capacity, dim); the first _size rows are live
+        self._last_seen = np.zeros(capacity, dtype=np.float64)
+        self._size = 0
+        self._rows = {}  # id -> row
+        self._documents = []
+        self._sources = []
+
+    @property
+    def nbytes(self):
+        """Bytes held by the vector matrix and timestamps"""
+        return (self._vectors.nbytes if self._vectors is not None else 0) + self._last_seen.nbytes
+
+    def count(self):
+        return self._size
+
+    def existing_ids(self, ids):
+        with self._lock:
+            return {doc_id for doc_id in ids if doc_id in self._rows}
+
+    def touch(self, ids, now):
+        with self._lock:
+            rows = [self._rows[doc_id] for doc_id in ids if doc_id in self._rows]
+            self._last_seen[rows] = now
+
+    def _grow(self, needed, dim):
+        """Doubles capacity until needed rows fit, copying live rows once per resize"""
+        if self._vectors is None:
+            self._capacity = max(self._capacity, needed)
+            self._vectors = np.empty((self._capacity, dim), dtype=np.float32)
+            self._last_seen = np.zeros(self._capacity, dtype=np.float64)
+            return
+        if needed <= self._capacity:
+            return
+        while self._capacity < needed:
+            self._capacity *= 2
+        vectors = np.empty((self._capacity, dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        last_seen = np.zeros(self._capacity, dtype=np.float64)
+        last_seen[:self._size] = self._last_seen[:self._size]
+        self._vectors, self._last_seen = vectors, last_seen
+
+    def add(self, ids, documents, embeddings, sources, now):
+        vectors = normalize_rows(embeddings)
+        with self._lock:
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in self._rows]
+            if not keep:
+                return
+            start = self._size
+            self._grow(start + len(keep), vectors.shape[1])
+            self._vectors[start:start + len(keep)] = vectors[keep]
+            self._last_seen[start:start + len(keep)] = now
+            for offset, i in enumerate(keep):
+                self._rows[ids[i]] = start + offset
+                self._documents.append(documents[i])
+                self._sources.append(sources[i] or "")
+            self._size += len(keep)
+
+    def _mask(self, size, max_age_seconds, sources):
+        """Boolean mask of live rows passing the recency and source filters (None if unfiltered)"""
+        mask = None
+        if max_age_seconds is not None:
+            mask = self._last_seen[:size] >= time.time() - max_age_seconds
+        if sources:
+            allowed = set(sources)
+            by_source = np.fromiter((source in allowed for source in self._sources[:size]), dtype=bool, count=size)
+            mask = by_source if mask is None else mask & by_source
+        return mask
+
+    def query(self, query_embeddings, n_results, max_age_seconds=None, sources=None):
+        """Returns (documents, embeddings), one list per query, ranked by cosine similarity"""
+        queries = normalize_rows(query_embeddings)
+        with self._lock:
+            size = self._size
+            mask = self._mask(size, max_age_seconds, sources) if size else None
+            k = min(n_results, size if mask is None else int(mask.sum()))
+            if k <= 0:
+                return [[] for _ in queries], [[] for _ in queries]
+
+            # One matrix product scores every chunk against every query
+            scores = queries @ self._vectors[:size].T
+            if mask is not None:
+                scores[:, ~mask] = -np.inf
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+
+            documents = [[self._documents[i] for i in row] for row in top]
+            embeddings = [self._vectors[row] for row in top]  # Fancy indexing copies the rows
+        return documents, embeddings
+
+    def clear(self):
+        with self._lock:
+            self._vectors = None
+            self._size = 0
+            self._rows.clear()
+            self._documents.clear()
+            self._sources.clear()
+
+    def drop(self):
+        with _memory_lock:
+            if _memory_stores.get(self.name) is self:
+                del _memory_stores[self.name]
+        self.clear()
+
+def _memory_store(name):
+    """Returns the process's in-memory collection for name, evicting the least recently used beyond the cap"""
+    with _memory_lock:
+        store = _memory_stores.get(name)
+        if store is None:
+            store = _memory_stores[name] = MemoryStore(name)
+        _memory_stores.move_to_end(name)
+        while len(_memory_stores) > MEMORY_MAX_COLLECTIONS:
+            evicted, _ = _memory_stores.popitem(last=False)
+            print(f"--- [VECTOR STORE] Evicted in-memory collection {evicted} ---")
+        return store
+
+def open_store(name, embedding_fn, backend=None):
+    """Opens the named collection on the configured backend ("memory" or "chroma")"""
+    backend = backend or VECTOR_BACKEND
+    if backend == "memory":
+        return _memory_store(name)
+    if backend == "chroma":
+        return ChromaStore(name, embedding_fn)
+    raise ValueError(f"Unknown vector backend: {backend}")
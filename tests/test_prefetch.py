@@ -0,0 +1,47 @@
+"""Prefetcher tests - background runs must not depend on Streamlit's script thread"""
+import functools
+import threading
+
+from src.graph import thread_config
+from src.prefetch import CheckpointPrefetcher
+
+CHECKPOINTS = [{"topic": f"Checkpoint {i}", "obj": "A, B"} for i in range(3)]
+
+class RecordingGraph:
+    """Graph stand-in that records the config and thread of each run"""
+
+    def __init__(self):
+        self.configs = []
+        self.threads = []
+
+    def get_state(self, config):
+        return type("Snapshot", (), {"values": {}})()
+
+    def stream(self, state, config=None, stream_mode=None):
+        self.configs.append(config)
+        self.threads.append(threading.current_thread())
+        yield {**state, "questions": ["1. Q"]}
+
+def test_prefetch_runs_off_the_script_thread_with_bound_config():
+    graph = RecordingGraph()
+    prefetcher = CheckpointPrefetcher(
+        graph, CHECKPOINTS, lookahead=1, config_for=functools.partial(thread_config, "session", "path")
+    )
+    prefetcher.schedule(0)
+
+    state = prefetcher.take(1)
+
+    assert state is not None and state["questions"]
+    assert graph.configs == [thread_config("session", "path", 1)]
+    assert graph.threads[0] is not threading.current_thread()
+
+def test_failed_prefetch_reports_failure_and_falls_back():
+    def config_for(idx):
+        raise AttributeError("st.session_state has no attribute 'session_id'")
+
+    prefetcher = CheckpointPrefetcher(RecordingGraph(), CHECKPOINTS, lookahead=1, config_for=config_for)
+    prefetcher.schedule(0)
+    prefetcher._futures[1].exception()
+
+    assert prefetcher.status(1) == "failed"
+    assert prefetcher.take(1) is None
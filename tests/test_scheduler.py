@@ -0,0 +1,135 @@
+"""Scheduler tests - fair admission across sessions, budget waits and retries, on a fake clock"""
+import asyncio
+import threading
+import time
+import types
+
+import pytest
+
+from src import scheduler
+from src.scheduler import LLMScheduler, set_session
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting for the scheduler"
+        time.sleep(0.005)
+
+class FakeClock:
+    """Stands in for the scheduler's time module: monotonic() is manual, sleep() is recorded"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(scheduler, "time", types.SimpleNamespace(monotonic=fake.monotonic, sleep=fake.sleep))
+    return fake
+
+class ProviderError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = types.SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+def queue_call(sched, session, admitted, tokens=1):
+    """Starts a thread that queues one call for session and records its admission order"""
+    def call():
+        set_session(session)
+        entry = sched.acquire(tokens)
+        admitted.append(session)
+        sched.release(entry)
+
+    depth = sched.metrics()["queue_depth"]
+    thread = threading.Thread(target=call, daemon=True)
+    thread.start()
+    wait_until(lambda: sched.metrics()["queue_depth"] == depth + 1)
+    return thread
+
+def test_admission_alternates_between_sessions(clock):
+    sched = LLMScheduler(requests_per_minute=0, tokens_per_minute=0, max_concurrency=1)
+    held = sched.acquire(1)  # Occupies the only slot so every call below queues
+
+    admitted = []
+    threads = [queue_call(sched, session, admitted) for session in ["a", "a", "a", "b", "b"]]
+    sched.release(held)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert admitted == ["a", "b", "a", "b", "a"]
+    assert sched.metrics()["in_flight"] == 0
+
+def test_call_waits_for_the_token_budget_window(clock):
+    sched = LLMScheduler(requests_per_minute=0, tokens_per_minute=100, max_concurrency=4)
+    sched.release(sched.acquire(80))
+    assert sched._budget_wait(clock.now, 40) == 60
+
+    admitted = []
+    thread = queue_call(sched, "a", admitted, tokens=40)
+    thread.join(timeout=0.1)
+    assert admitted == []  # 80 + 40 tokens exceed the per-minute budget
+
+    clock.now += 60
+    with sched._cond:
+        sched._notify()
+    thread.join(timeout=5)
+    assert admitted == ["a"]
+
+def test_rate_limited_call_retries_after_the_advertised_delay(clock):
+    sched = LLMScheduler(requests_per_minute=0, tokens_per_minute=0, max_retries=4, base_delay=0.001)
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ProviderError(429, retry_after="2")
+        return "ok"
+
+    assert sched.run(call, 10) == "ok"
+    assert clock.sleeps == [2.0, 2.0]
+    metrics = sched.metrics()
+    assert (metrics["retries"], metrics["failures"], metrics["in_flight"]) == (2, 0, 0)
+
+def test_non_retryable_and_exhausted_errors_are_raised(clock):
+    sched = LLMScheduler(requests_per_minute=0, tokens_per_minute=0, max_retries=2, base_delay=0.001)
+
+    def bad_request():
+        raise ProviderError(400)
+
+    def overloaded():
+        raise ProviderError(503)
+
+    with pytest.raises(ProviderError):
+        sched.run(bad_request, 10)
+    assert clock.sleeps == []
+
+    with pytest.raises(ProviderError):
+        sched.run(overloaded, 10)
+    assert len(clock.sleeps) == 2
+    assert sched.metrics()["failures"] == 2
+
+def test_async_waiter_is_admitted_when_a_slot_frees(clock):
+    sched = LLMScheduler(requests_per_minute=0, tokens_per_minute=0, max_concurrency=1)
+
+    async def scenario():
+        held = sched.acquire(1)
+        waiter = asyncio.create_task(sched._aacquire(1))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        # Released from another thread, as a sync caller would
+        threading.Thread(target=sched.release, args=(held,)).start()
+        entry = await asyncio.wait_for(waiter, timeout=5)
+        sched.release(entry)
+
+    asyncio.run(scenario())
+    metrics = sched.metrics()
+    assert (metrics["admitted"], metrics["in_flight"], metrics["queue_depth"]) == (2, 0, 0)
@@ -0,0 +1,125 @@
+"""Single-flight tests - followers share the leader's result or exception instead of repeating its work"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.singleflight import SingleFlight, flight_key
+
+KEY = flight_key("generate_questions", "Machine Learning", "Regression")
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting for followers"
+        time.sleep(0.005)
+
+def followers_joined(flight, key, count):
+    return lambda: flight._calls.get(key) is not None and flight._calls[key].followers == count
+
+def run_with_followers(flight, leader_fn, followers=3):
+    """Leader runs leader_fn until released; returns (leader outcome, follower outcomes, follower fn calls)"""
+    release = threading.Event()
+    follower_calls = []
+    outcomes = {}
+
+    def leader():
+        release.wait(5)
+        return leader_fn()
+
+    def call(name, fn):
+        try:
+            outcomes[name] = ("result", flight.do(KEY, fn))
+        except Exception as e:
+            outcomes[name] = ("error", e)
+
+    threads = [threading.Thread(target=call, args=("leader", leader))]
+    threads[0].start()
+    wait_until(lambda: KEY in flight._calls)
+    for i in range(followers):
+        threads.append(threading.Thread(target=call, args=(i, lambda: follower_calls.append(1))))
+        threads[-1].start()
+    wait_until(followers_joined(flight, KEY, followers))
+
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    return outcomes.pop("leader"), [outcomes[i] for i in range(followers)], follower_calls
+
+def test_followers_share_a_copy_of_the_leader_result():
+    flight = SingleFlight()
+    leader, followers, follower_calls = run_with_followers(flight, lambda: {"questions": ["1. Q"]})
+
+    assert leader == ("result", {"questions": ["1. Q"]})
+    assert followers == [leader] * 3
+    assert all(result is not leader[1] for _, result in followers)  # Deep copies, safe to mutate
+    assert follower_calls == []
+    stats = flight.flight_stats()
+    assert stats["in_flight"] == 0
+    assert stats["nodes"]["generate_questions"]["executions"] == 1
+    assert stats["nodes"]["generate_questions"]["coalesced"] == 3
+
+def test_followers_receive_the_leader_exception():
+    flight = SingleFlight()
+    error = ValueError("rate limited")
+
+    def fail():
+        raise error
+
+    leader, followers, follower_calls = run_with_followers(flight, fail)
+
+    assert leader == ("error", error)
+    assert followers == [("error", error)] * 3
+    assert follower_calls == []
+    assert flight.flight_stats()["nodes"]["generate_questions"]["failures"] == 1
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    other = flight_key("generate_questions", "Statistics", "Regression")
+    assert flight.do(KEY, lambda: 1) == 1
+    assert flight.do(other, lambda: 2) == 2
+    assert flight.flight_stats()["nodes"]["generate_questions"]["coalesced"] == 0
+
+def test_async_followers_share_the_leader_result():
+    flight = SingleFlight()
+
+    async def scenario():
+        release = asyncio.Event()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return ["context"]
+
+        tasks = [asyncio.create_task(flight.ado(KEY, work)) for _ in range(4)]
+        await asyncio.sleep(0)
+        assert flight._calls[KEY].followers == 3
+        release.set()
+        return await asyncio.gather(*tasks), calls
+
+    results, calls = asyncio.run(scenario())
+    assert results == [["context"]] * 4
+    assert calls == [1]
+
+def test_cancelled_leader_lets_a_follower_run_the_work():
+    flight = SingleFlight()
+
+    async def scenario():
+        async def stalled():
+            await asyncio.Event().wait()
+
+        async def work():
+            return "fresh"
+
+        leader = asyncio.create_task(flight.ado(KEY, stalled))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.ado(KEY, work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.wait_for(follower, timeout=5)
+
+    assert asyncio.run(scenario()) == "fresh"
@@ -0,0 +1,17 @@
+"""Startup tests - app.py's module-level imports must stay within the first-paint budget"""
+import json
+import os
+
+from benchmarks.startup import PROJECT_ROOT, first_paint_modules, profile_imports
+
+with open(os.path.join(PROJECT_ROOT, "benchmarks", "thresholds.json")) as f:
+    BUDGET_SECONDS = json.load(f)["startup.first_paint_imports"]["p95_ms"] / 1000
+
+def test_first_paint_imports_within_budget():
+    modules = first_paint_modules()
+    assert modules
+
+    # Best of three, so one slow run on a busy machine does not fail the suite
+    seconds, packages = min((profile_imports(modules) for _ in range(3)), key=lambda run: run[0])
+    slowest = sorted(packages.items(), key=lambda item: -item[1])[:5]
+    assert seconds < BUDGET_SECONDS, f"first-paint imports took {seconds * 1000:.0f} ms; slowest: {slowest}"